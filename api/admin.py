@@ -6,8 +6,8 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 
+from api.handlers.message_handler import MessageHandler
 from api.tasks import TaskManager
-from api.utils import get_mailing_messages
 
 from .forms import ClientAdminForm, MailingAdminForm
 from .models import Client, Mailing
@@ -15,6 +15,7 @@ from .models import Client, Mailing
 list_per_page = settings.PAGE_SIZE
 
 task_manager = TaskManager()
+message_handler = MessageHandler()
 
 
 def mailing_detail(obj):
@@ -39,6 +40,8 @@ class MailingAdmin(admin.ModelAdmin):
         "delivered_messages",
         "undelivered_messages",
         "cancelled_messages",
+        "dispatched_messages",
+        "fanout_status",
         "created_at",
         "updated_at",
         mailing_detail,
@@ -52,6 +55,8 @@ class MailingAdmin(admin.ModelAdmin):
         "delivered_messages",
         "undelivered_messages",
         "cancelled_messages",
+        "dispatched_messages",
+        "fanout_status",
         "created_at",
         "updated_at",
     ]
@@ -70,18 +75,12 @@ class MailingAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         obj.save()
         if change:
-            messages = get_mailing_messages(obj)
-            for message in messages:
-                task_manager.update_message_celery_task(message)
+            task_manager.reschedule_mailing_messages(obj)
         else:
-            messages = get_mailing_messages(obj, created=True)
-            for message in messages:
-                task_manager.create_message_celery_task(message)
+            message_handler.create_messages(obj.id)
 
     def delete_model(self, request, obj):
-        messages = get_mailing_messages(obj)
-        for message in messages:
-            task_manager.delete_message_celery_task(message)
+        task_manager.cancel_mailing_messages(obj)
         obj.delete()
 
 
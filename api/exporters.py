@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+import zlib
+from datetime import tzinfo
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.utils import chunked
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, tzinfo):
+            return str(o)
+        return super().default(o)
+
+
+def write_csv(fields, rows, chunk_size):
+    """
+    Write rows as CSV with a header row.
+
+    Args:
+        fields (list): The field names.
+        rows (Iterable): The rows as tuples of field values.
+        chunk_size (int): The number of rows written at once.
+
+    Yields:
+        str: The next chunk of the file.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in chunked(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_ndjson(fields, rows, chunk_size):
+    """
+    Write rows as newline-delimited JSON objects.
+
+    Args:
+        fields (list): The field names.
+        rows (Iterable): The rows as tuples of field values.
+        chunk_size (int): The number of rows written at once.
+
+    Yields:
+        str: The next chunk of the file.
+    """
+    for chunk in chunked(rows, chunk_size):
+        yield "".join(
+            json.dumps(dict(zip(fields, row)), cls=ExportJSONEncoder) + "\n"
+            for row in chunk
+        )
+
+
+EXPORT_FORMATS = {
+    "csv": (write_csv, "text/csv"),
+    "ndjson": (write_ndjson, "application/x-ndjson"),
+}
+
+
+def gzip_chunks(chunks):
+    """
+    Compress text chunks into a single gzip stream.
+
+    Args:
+        chunks (Iterable): The text chunks.
+
+    Yields:
+        bytes: The next compressed chunk.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        if data := compressor.compress(chunk.encode()):
+            yield data
+    yield compressor.flush()
+
+
+def export_queryset(queryset, fields, file_format, compress=False):
+    """
+    Export a queryset using a database iterator, in constant memory.
+
+    Args:
+        queryset (QuerySet): The objects to export.
+        fields (list): The exported field names.
+        file_format (str): One of EXPORT_FORMATS.
+        compress (bool, optional): Whether to gzip the file. Defaults to
+            False.
+
+    Returns:
+        Iterator: The chunks of the file.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    write, _ = EXPORT_FORMATS[file_format]
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    chunks = write(fields, rows, chunk_size)
+    if compress:
+        return gzip_chunks(chunks)
+    return chunks
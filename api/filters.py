@@ -0,0 +1,83 @@
+import functools
+import re
+
+import pytz
+from django.db.models import Q
+
+OPERATOR_CODE_PATTERN = re.compile(r"^\d{3}$")
+
+FILTER_LOOKUPS = {
+    "op": "operator_code",
+    "tag": "tag",
+    "tz": "time_zone",
+}
+
+
+def split_atom(atom):
+    negated = atom.startswith("!")
+    atom = atom.removeprefix("!").strip()
+    prefix, separator, value = atom.partition(":")
+    if separator and prefix in FILTER_LOOKUPS:
+        return negated, FILTER_LOOKUPS[prefix], value.strip()
+    return negated, None, atom
+
+
+def compile_atom(atom):
+    negated, field, value = split_atom(atom)
+    if not value:
+        raise ValueError(f"Empty condition in client filter: '{atom}'")
+    if field == "time_zone" and value not in pytz.all_timezones_set:
+        raise ValueError(f"Unknown time zone in client filter: '{value}'")
+    if field:
+        condition = Q(**{field: value})
+    elif OPERATOR_CODE_PATTERN.match(value):
+        condition = Q(operator_code=value) | Q(tag=value)
+    else:
+        condition = Q(tag=value)
+    return ~condition if negated else condition
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_client_filter(client_filter):
+    """
+    Compile a mailing client filter into a query condition.
+
+    The filter is a comma-separated list of alternatives. Plain tokens match
+    clients by operator code or tag and are collected into two IN lookups,
+    so the condition can use the operator code and tag indexes. An
+    alternative may also join several conditions with '&', negate a condition
+    with '!' and use the 'op:', 'tag:' and 'tz:' prefixes to match a single
+    field, e.g. '999, tag:VIP & !tz:Europe/Moscow'.
+
+    Args:
+        client_filter (str): The mailing client filter.
+
+    Raises:
+        ValueError: If the filter contains an empty condition or an unknown
+            time zone.
+
+    Returns:
+        Q: The condition of the mailing clients.
+    """
+    operator_codes = set()
+    tags = set()
+    conditions = Q()
+    for alternative in client_filter.split(","):
+        atoms = [atom.strip() for atom in alternative.split("&")]
+        atoms = [atom for atom in atoms if atom]
+        if not atoms:
+            continue
+        if len(atoms) == 1 and split_atom(atoms[0])[:2] == (False, None):
+            tags.add(atoms[0])
+            if OPERATOR_CODE_PATTERN.match(atoms[0]):
+                operator_codes.add(atoms[0])
+            continue
+        alternative_conditions = Q()
+        for atom in atoms:
+            alternative_conditions &= compile_atom(atom)
+        conditions |= alternative_conditions
+    if operator_codes:
+        conditions |= Q(operator_code__in=sorted(operator_codes))
+    if tags:
+        conditions |= Q(tag__in=sorted(tags))
+    return conditions
@@ -0,0 +1,75 @@
+import os
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from api.ratelimit import get_rate_limiter
+
+
+class GatewayClient:
+    def __init__(
+        self,
+        api_url,
+        api_token,
+        connect_timeout,
+        read_timeout,
+        pool_connections,
+        pool_maxsize,
+        rate_limiter=None,
+    ):
+        self.api_url = api_url
+        self.rate_limiter = rate_limiter
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": api_token})
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def send(self, message_id, phone, text, rate_limited=True):
+        api_data = {
+            "id": message_id,
+            "phone": phone,
+            "text": text,
+        }
+        if self.rate_limiter and rate_limited:
+            self.rate_limiter.acquire(operator_code=phone[1:4])
+        response = self.session.post(
+            self.api_url + str(message_id),
+            json=api_data,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response
+
+
+_gateway_client = None
+_gateway_client_pid = None
+
+
+def get_gateway_client():
+    """
+    Return the gateway client of the current process.
+
+    The client is created lazily and recreated after a fork, so every Celery
+    worker process keeps its own pool of connections.
+
+    Returns:
+        GatewayClient: The gateway client of the current process.
+    """
+    global _gateway_client, _gateway_client_pid
+    if _gateway_client is None or _gateway_client_pid != os.getpid():
+        _gateway_client = GatewayClient(
+            api_url=settings.API_URL,
+            api_token=settings.API_TOKEN,
+            connect_timeout=settings.API_CONNECT_TIMEOUT,
+            read_timeout=settings.API_READ_TIMEOUT,
+            pool_connections=settings.API_POOL_CONNECTIONS,
+            pool_maxsize=settings.API_POOL_MAXSIZE,
+            rate_limiter=get_rate_limiter(),
+        )
+        _gateway_client_pid = os.getpid()
+    return _gateway_client
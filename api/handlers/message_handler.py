@@ -1,48 +1,51 @@
 import functools
 
+from django.conf import settings
 from django.db import transaction
 
 from api.models import Mailing
 from api.tasks import TaskManager
-from api.utils import get_mailing_messages
+from api.utils import create_mailing_messages
 
 task_manager = TaskManager()
 
 
 class MessageHandler:
-    @transaction.atomic
-    @staticmethod
+    # Not atomic: the messages are committed chunk by chunk, so the progress
+    # of a large mailing is visible while they are being created
     def create_messages(self, instance_id):
         mailing = Mailing.objects.get(id=instance_id)
-        messages = get_mailing_messages(mailing, created=True)
-        for message in messages:
+        create_mailing_messages(mailing)
+        mailing.set_fanout_status(Mailing.FanoutStatus.DONE)
+        if settings.MESSAGES_DISPATCH_MODE == "bucket":
+            task_manager.create_mailing_schedules(mailing)
+            return
+        if settings.MESSAGES_DISPATCH_MODE == "batch":
             transaction.on_commit(
                 functools.partial(
-                    task_manager.create_message_celery_task,
-                    message=message,
+                    task_manager.create_mailing_batch_celery_tasks,
+                    mailing=mailing,
                 )
             )
+            return
+        transaction.on_commit(
+            functools.partial(
+                task_manager.create_mailing_message_celery_tasks,
+                mailing=mailing,
+            )
+        )
 
     @transaction.atomic
     @staticmethod
     def update_messages(self, instance):
-        messages = get_mailing_messages(instance)
-        for message in messages:
-            transaction.on_commit(
-                functools.partial(
-                    task_manager.update_message_celery_task,
-                    message=message,
-                )
+        transaction.on_commit(
+            functools.partial(
+                task_manager.reschedule_mailing_messages,
+                mailing=instance,
             )
+        )
 
     @transaction.atomic
     @staticmethod
     def delete_messages(self, instance):
-        messages = get_mailing_messages(instance)
-        for message in messages:
-            transaction.on_commit(
-                functools.partial(
-                    task_manager.delete_message_celery_task,
-                    message=message,
-                )
-            )
+        task_manager.cancel_mailing_messages(instance)
@@ -0,0 +1,144 @@
+import csv
+import json
+
+import pytz
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from api.models import Client
+from api.utils import chunked
+from api.validators import phone_validator
+
+TAG_MAX_LENGTH = Client._meta.get_field("tag").max_length
+
+
+def read_clients_csv(lines):
+    """
+    Read clients from CSV lines with a header row.
+
+    Args:
+        lines (Iterable): The decoded lines of the file.
+
+    Yields:
+        tuple: The line number and the row as a dict.
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_clients_ndjson(lines):
+    """
+    Read clients from newline-delimited JSON lines.
+
+    Lines which are not valid JSON are yielded as is, so that they are
+    reported as invalid rows.
+
+    Args:
+        lines (Iterable): The decoded lines of the file.
+
+    Yields:
+        tuple: The line number and the row.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, line
+
+
+def build_client(row):
+    """
+    Validate a row and build an unsaved client from it.
+
+    Phones are validated with the same rule as ClientSerializer and the
+    operator code is derived the same way as in Client.save.
+
+    Args:
+        row (dict): The client fields: phone, tag and time_zone.
+
+    Returns:
+        tuple: The client, or None if the row is invalid, and the errors
+        by field.
+    """
+    if not isinstance(row, dict):
+        return None, {"non_field_errors": ["Expected an object"]}
+    errors = {}
+    phone = row.get("phone")
+    # JSON numbers are accepted as phones, booleans are ints too
+    if isinstance(phone, int) and not isinstance(phone, bool):
+        phone = str(phone)
+    if not isinstance(phone, str):
+        errors["phone"] = ["Expected a string"]
+    else:
+        phone = phone.strip()
+        try:
+            phone_validator(phone)
+        except ValidationError as e:
+            errors["phone"] = e.messages
+    tag = row.get("tag") or None
+    if tag is not None and not isinstance(tag, str):
+        errors["tag"] = ["Expected a string"]
+    elif tag and len(tag) > TAG_MAX_LENGTH:
+        errors["tag"] = [
+            f"Ensure this field has no more than {TAG_MAX_LENGTH} characters"
+        ]
+    time_zone = row.get("time_zone") or "UTC"
+    if not isinstance(time_zone, str):
+        errors["time_zone"] = ["Expected a string"]
+    elif time_zone not in pytz.all_timezones_set:
+        errors["time_zone"] = [f"Unknown time zone '{time_zone}'"]
+    if errors:
+        return None, errors
+    client = Client(
+        phone=phone,
+        operator_code=phone[1:4],
+        tag=tag,
+        time_zone=pytz.timezone(time_zone),
+    )
+    return client, errors
+
+
+def import_clients(rows, chunk_size=None):
+    """
+    Create or update clients in chunks using bulk upserts by phone.
+
+    Invalid rows are skipped and reported, the valid ones are imported
+    anyway, so the imported and failed rows add up to all the rows. When a
+    phone is repeated, its last row wins. Bulk upserts bypass the post_save
+    signals.
+
+    Args:
+        rows (Iterable): The line numbers and rows of the file.
+        chunk_size (int, optional): The number of clients upserted at once.
+            Defaults to settings.CLIENTS_IMPORT_CHUNK_SIZE.
+
+    Returns:
+        dict: The numbers of imported and failed rows and the errors of the
+        first settings.CLIENTS_IMPORT_MAX_ERRORS failed rows.
+    """
+    chunk_size = chunk_size or settings.CLIENTS_IMPORT_CHUNK_SIZE
+    imported = 0
+    failed = 0
+    errors = []
+    for chunk in chunked(rows, chunk_size):
+        # A single upsert cannot update the same row twice
+        clients = {}
+        for line_number, row in chunk:
+            client, row_errors = build_client(row)
+            if row_errors:
+                failed += 1
+                if len(errors) < settings.CLIENTS_IMPORT_MAX_ERRORS:
+                    errors.append({"line": line_number, **row_errors})
+                continue
+            clients[client.phone] = client
+            imported += 1
+        Client.objects.bulk_create(
+            clients.values(),
+            update_conflicts=True,
+            unique_fields=["phone"],
+            update_fields=["operator_code", "tag", "time_zone", "updated_at"],
+        )
+    return {"imported": imported, "failed": failed, "errors": errors}
@@ -0,0 +1,56 @@
+import atexit
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Hand log records over to a background thread which passes them to the
+    given handlers, so that logging does not block on file writes.
+
+    The handlers are referenced in the logging config as
+    "cfg://handlers.<name>" and must be named to be configured before this
+    handler.
+
+    Threads do not survive fork(), so a forked process (e.g. a Celery
+    prefork pool worker) starts its own listener on its first record.
+    """
+
+    def __init__(self, handlers, maxsize=0):
+        super().__init__(queue.Queue(maxsize))
+        self.handlers = [handlers[i] for i in range(len(handlers))]
+        self.maxsize = maxsize
+        self.listener = None
+        self.pid = None
+        self.start()
+        atexit.register(self.stop)
+
+    def start(self):
+        # Records queued by the parent before the fork are written by it
+        self.queue = queue.Queue(self.maxsize)
+        self.listener = QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+        self.pid = os.getpid()
+
+    def stop(self):
+        """
+        Write the queued records and stop the listener. Stopping a stopped
+        listener or the listener of the parent process does nothing.
+        """
+        if self.listener and self.pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+    def emit(self, record):
+        # Handler.handle calls emit with the handler lock held
+        if self.pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+    def prepare(self, record):
+        # Records do not leave the process, so message formatting is left to
+        # the listener thread
+        return record
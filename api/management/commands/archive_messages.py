@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from api.utils import archive_ended_mailings
+
+
+class Command(BaseCommand):
+    help = "Move the messages of the ended mailings to the archive table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Archive mailings ended more than this number of days ago",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Number of messages moved at once",
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_ended_mailings(
+            days=options["days"], chunk_size=options["chunk_size"]
+        )
+        for mailing_id, count in archived.items():
+            self.stdout.write(f"Mailing_{mailing_id}: {count} messages")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{sum(archived.values())} messages of {len(archived)} "
+                "mailings archived"
+            )
+        )
@@ -1,50 +1,92 @@
-import json
 import logging
-from urllib.parse import unquote
+import random
+import time
+
+from django.conf import settings
 
 logger = logging.getLogger("api")
 
+LOGGED_CONTENT_TYPES = (
+    "application/json",
+    "application/x-www-form-urlencoded",
+)
+
+
+class TruncatedBody:
+    """
+    Request or response body which is decoded only when it is logged.
+    """
+
+    __slots__ = ("body", "max_length")
+
+    def __init__(self, body, max_length):
+        self.body = body[: max_length + 1]
+        self.max_length = max_length
+
+    def __str__(self):
+        text = self.body[: self.max_length].decode("utf-8", "replace")
+        if len(self.body) > self.max_length:
+            return f"{text}... (truncated)"
+        return text
+
 
 class APILoggingMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        self.excluded_paths = tuple(settings.API_LOG_EXCLUDED_PATHS)
+        self.sample_rate = settings.API_LOG_SAMPLE_RATE
+        self.max_body_length = settings.API_LOG_MAX_BODY_LENGTH
 
     def __call__(self, request):
-        if request.path == "/metrics":
-            response = self.get_response(request)
-            return response
+        if not self.should_log(request):
+            return self.get_response(request)
+        started_at = time.perf_counter()
         self.log_request(request)
         response = self.get_response(request)
-        self.log_response(response)
+        self.log_response(request, response, time.perf_counter() - started_at)
         return response
 
+    def should_log(self, request):
+        if not logger.isEnabledFor(logging.INFO):
+            return False
+        if request.path.startswith(self.excluded_paths):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def is_body_logged(self, content_type):
+        return bool(self.max_body_length) and content_type.startswith(
+            LOGGED_CONTENT_TYPES
+        )
+
     def log_request(self, request):
         body = None
-        if request.content_type == "application/json":
-            try:
-                body = request.data
-            except AttributeError:
-                body = request.body.decode("utf-8")
-        elif request.content_type == "application/x-www-form-urlencoded":
-            json_data = {
-                key: unquote(value) for key, value in request.POST.items()
-            }
-            body = json.dumps(json_data, indent=2)
-
+        # Bodies of other content types, such as imported files, are not
+        # read, so that the views can stream them
+        if self.is_body_logged(request.content_type or ""):
+            body = TruncatedBody(request.body, self.max_body_length)
         logger.info(
-            f"API Request: {request.method} {request.path}, "
-            f"Body: {body}, "
-            f"Headers: {request.headers}"
+            "API Request: %s %s, Body: %s",
+            request.method,
+            request.path,
+            body,
         )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("API Request Headers: %s", dict(request.headers))
 
-    def log_response(self, response):
-        try:
-            body = response.data
-        except AttributeError:
-            body = None
-
+    def log_response(self, request, response, duration):
+        body = None
+        if not response.streaming and self.is_body_logged(
+            response.get("Content-Type", "")
+        ):
+            body = TruncatedBody(response.content, self.max_body_length)
         logger.info(
-            f"API Response: Status Code: {response.status_code}, "
-            f"Body: {body}, "
-            f"Headers: {response.headers}"
+            "API Response: %s %s, Status Code: %s, Duration: %.1f ms, "
+            "Body: %s",
+            request.method,
+            request.path,
+            response.status_code,
+            duration * 1000,
+            body,
         )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("API Response Headers: %s", dict(response.headers))
@@ -1,7 +1,7 @@
 # Generated by Django 4.2.10 on 2024-03-15 07:21
 
-from django.db import migrations
 import timezone_field.fields
+from django.db import migrations
 
 
 class Migration(migrations.Migration):
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+import django.db.models.deletion
+import django_prometheus.models
+import timezone_field.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_alter_client_time_zone"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MailingSchedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "time_zone",
+                    timezone_field.fields.TimeZoneField(use_pytz=True),
+                ),
+                ("send_time", models.DateTimeField(db_index=True)),
+                ("is_released", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "mailing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="mailing_schedules",
+                        to="api.mailing",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["send_time"],
+            },
+            bases=(
+                django_prometheus.models.ExportModelOperationsMixin(
+                    "mailing_schedule"
+                ),
+                models.Model,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="mailingschedule",
+            constraint=models.UniqueConstraint(
+                fields=("mailing", "time_zone"),
+                name="unique_mailing_time_zone",
+            ),
+        ),
+    ]
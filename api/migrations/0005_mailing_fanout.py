@@ -0,0 +1,33 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_message_attempts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailing",
+            name="dispatched_messages",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="mailing",
+            name="fanout_status",
+            field=models.CharField(
+                choices=[
+                    ("PE", "Pending"),
+                    ("IP", "In progress"),
+                    ("DN", "Done"),
+                    ("FA", "Failed"),
+                ],
+                default="DN",
+                editable=False,
+                max_length=2,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_mailing_fanout"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailing",
+            name="version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
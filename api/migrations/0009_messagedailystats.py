@@ -0,0 +1,74 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+import django.db.models.deletion
+import django_prometheus.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_message_datetime_send_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="message",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name="MessageDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("SC", "Scheduled"),
+                            ("DL", "Delivered"),
+                            ("ND", "Not delivered"),
+                            ("CA", "Cancelled"),
+                        ],
+                        max_length=2,
+                    ),
+                ),
+                ("operator_code", models.CharField(max_length=3)),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("refreshed_at", models.DateTimeField(db_index=True)),
+                (
+                    "mailing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="api.mailing",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date", "mailing", "status", "operator_code"],
+            },
+            bases=(
+                django_prometheus.models.ExportModelOperationsMixin(
+                    "message_daily_stats"
+                ),
+                models.Model,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="messagedailystats",
+            constraint=models.UniqueConstraint(
+                fields=("date", "mailing", "status", "operator_code"),
+                name="unique_message_daily_stats",
+            ),
+        ),
+    ]
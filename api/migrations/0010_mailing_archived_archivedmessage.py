@@ -0,0 +1,77 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+import django.db.models.deletion
+import django_prometheus.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_messagedailystats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailing",
+            name="archived",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name="ArchivedMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("datetime_send", models.DateTimeField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("SC", "Scheduled"),
+                            ("DL", "Delivered"),
+                            ("ND", "Not delivered"),
+                            ("CA", "Cancelled"),
+                        ],
+                        max_length=2,
+                    ),
+                ),
+                (
+                    "celery_task_id",
+                    models.CharField(blank=True, max_length=36, null=True),
+                ),
+                ("scheduled_at", models.DateTimeField(blank=True, null=True)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_messages",
+                        to="api.client",
+                    ),
+                ),
+                (
+                    "mailing",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_messages",
+                        to="api.mailing",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-id"],
+            },
+            bases=(
+                django_prometheus.models.ExportModelOperationsMixin(
+                    "archived_message"
+                ),
+                models.Model,
+            ),
+        ),
+    ]
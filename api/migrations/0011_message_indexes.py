@@ -0,0 +1,86 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    Build the index without blocking writes to the table on PostgreSQL.
+    Other databases build it as usual.
+    """
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+    # Indexes cannot be built concurrently inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("api", "0010_mailing_archived_archivedmessage"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                fields=["created_at"], name="api_message_created_at"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                fields=["mailing", "status"],
+                name="api_message_mailing_status",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                fields=["status", "created_at"],
+                name="api_message_status_created",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="message",
+            index=models.Index(
+                condition=models.Q(("status", "SC")),
+                fields=["mailing", "scheduled_at"],
+                name="api_message_scheduled",
+            ),
+        ),
+        # The mailing index is covered by (mailing, status). Dropping it
+        # does not scan the table.
+        migrations.AlterField(
+            model_name="message",
+            name="mailing",
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="mailing_messages",
+                to="api.mailing",
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def tie_messages_to_schedules(apps, schema_editor):
+    MailingSchedule = apps.get_model("api", "MailingSchedule")
+    Message = apps.get_model("api", "Message")
+    for schedule in MailingSchedule.objects.filter(is_released=False):
+        Message.objects.filter(
+            mailing=schedule.mailing_id,
+            status="SC",
+            client__time_zone=schedule.time_zone,
+        ).update(schedule=schedule)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_message_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="schedule_messages",
+                to="api.mailingschedule",
+            ),
+        ),
+        migrations.RunPython(
+            tie_messages_to_schedules, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+import django_prometheus.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_message_schedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateLimitBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("tokens", models.FloatField()),
+                ("updated_at", models.DateTimeField()),
+            ],
+            bases=(
+                django_prometheus.models.ExportModelOperationsMixin(
+                    "rate_limit_bucket"
+                ),
+                models.Model,
+            ),
+        ),
+    ]
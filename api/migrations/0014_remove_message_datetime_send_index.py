@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_ratelimitbucket"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="message",
+            name="datetime_send",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
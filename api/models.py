@@ -4,6 +4,8 @@ from django.utils import timezone
 from django_prometheus.models import ExportModelOperationsMixin
 from timezone_field import TimeZoneField
 
+from api.filters import compile_client_filter
+
 all_timezones = pytz.all_timezones
 
 
@@ -42,6 +44,12 @@ class Client(ExportModelOperationsMixin("client"), models.Model):
 
 
 class Mailing(ExportModelOperationsMixin("mailing"), models.Model):
+    class FanoutStatus(models.TextChoices):
+        PENDING = "PE", "Pending"
+        IN_PROGRESS = "IP", "In progress"
+        DONE = "DN", "Done"
+        FAILED = "FA", "Failed"
+
     datetime_start = models.DateTimeField()
     datetime_end = models.DateTimeField()
     text = models.TextField()
@@ -54,6 +62,15 @@ class Mailing(ExportModelOperationsMixin("mailing"), models.Model):
     delivered_messages = models.IntegerField(default=0)
     undelivered_messages = models.IntegerField(default=0)
     cancelled_messages = models.IntegerField(default=0)
+    dispatched_messages = models.IntegerField(default=0, editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
+    archived = models.BooleanField(default=False, editable=False)
+    fanout_status = models.CharField(
+        max_length=2,
+        choices=FanoutStatus.choices,
+        default=FanoutStatus.DONE,
+        editable=False,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -61,34 +78,22 @@ class Mailing(ExportModelOperationsMixin("mailing"), models.Model):
         ordering = ["-id"]
 
     def get_mailing_clients(self):
-        filter_conditions = models.Q()
-
         if self.client_filter:
-            tags = [tag.strip() for tag in self.client_filter.split(",")]
-            for tag in tags:
-                filter_conditions |= models.Q(operator_code=tag) | models.Q(
-                    tag=tag
-                )
-        if filter_conditions:
-            clients = Client.objects.filter(filter_conditions)
-        else:
-            clients = Client.objects.all()
-        return clients
+            return Client.objects.filter(
+                compile_client_filter(self.client_filter)
+            )
+        return Client.objects.all()
 
     def update_messages_info(self):
-        self.created_messages = Message.objects.filter(mailing=self.id).count()
-        self.scheduled_messages = Message.objects.filter(
-            mailing=self.id, status=Message.Status.SCHEDULED
-        ).count()
-        self.delivered_messages = Message.objects.filter(
-            mailing=self.id, status=Message.Status.DELIVERED
-        ).count()
-        self.undelivered_messages = Message.objects.filter(
-            mailing=self.id, status=Message.Status.NOT_DELIVERED
-        ).count()
-        self.cancelled_messages = Message.objects.filter(
-            mailing=self.id, status=Message.Status.CANCELLED
-        ).count()
+        status_counts = dict(
+            Message.objects.filter(mailing=self.id)
+            .values_list("status")
+            .annotate(models.Count("id"))
+            .order_by()
+        )
+        self.created_messages = sum(status_counts.values())
+        for status, counter in MESSAGE_STATUS_COUNTERS.items():
+            setattr(self, counter, status_counts.get(status, 0))
         self.save(
             update_fields=[
                 "created_messages",
@@ -99,8 +104,41 @@ class Mailing(ExportModelOperationsMixin("mailing"), models.Model):
             ]
         )
 
-    def set_clients_count(self, clients):
-        self.clients_count = len(clients)
+    @staticmethod
+    def update_messages_counters(
+        mailing_id, old_status=None, new_status=None, count=1
+    ):
+        if old_status == new_status:
+            return
+        counters = {}
+        if old_status is None:
+            counters["created_messages"] = models.F("created_messages") + count
+        else:
+            counter = MESSAGE_STATUS_COUNTERS[old_status]
+            counters[counter] = models.F(counter) - count
+        if new_status is not None:
+            counter = MESSAGE_STATUS_COUNTERS[new_status]
+            counters[counter] = models.F(counter) + count
+        Mailing.objects.filter(id=mailing_id).update(**counters)
+
+    @staticmethod
+    def update_dispatched_messages(mailing_id, count=1):
+        Mailing.objects.filter(id=mailing_id).update(
+            dispatched_messages=models.F("dispatched_messages") + count
+        )
+
+    def increment_version(self):
+        Mailing.objects.filter(id=self.id).update(
+            version=models.F("version") + 1
+        )
+        self.refresh_from_db(fields=["version"])
+
+    def set_fanout_status(self, fanout_status):
+        self.fanout_status = fanout_status
+        self.save(update_fields=["fanout_status"])
+
+    def set_clients_count(self, clients_count):
+        self.clients_count = clients_count
         self.save(update_fields=["clients_count"])
 
 
@@ -120,13 +158,133 @@ class Message(ExportModelOperationsMixin("message"), models.Model):
         on_delete=models.SET_NULL,
         related_name="mailing_messages",
         null=True,
+        db_index=False,
     )
     client = models.ForeignKey(
         Client, on_delete=models.CASCADE, related_name="client_messages"
     )
+    schedule = models.ForeignKey(
+        "MailingSchedule",
+        on_delete=models.SET_NULL,
+        related_name="schedule_messages",
+        blank=True,
+        null=True,
+    )
     celery_task_id = models.CharField(max_length=36, blank=True, null=True)
+    scheduled_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["created_at"], name="api_message_created_at"),
+            models.Index(
+                fields=["mailing", "status"],
+                name="api_message_mailing_status",
+            ),
+            models.Index(
+                fields=["status", "created_at"],
+                name="api_message_status_created",
+            ),
+            models.Index(
+                fields=["mailing", "scheduled_at"],
+                condition=models.Q(status="SC"),
+                name="api_message_scheduled",
+            ),
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded_status = self.__dict__.get("status")
+
+
+class ArchivedMessage(
+    ExportModelOperationsMixin("archived_message"), models.Model
+):
+    id = models.BigIntegerField(primary_key=True)
+    datetime_send = models.DateTimeField()
+    status = models.CharField(max_length=2, choices=Message.Status.choices)
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.SET_NULL,
+        related_name="archived_messages",
+        null=True,
+    )
+    client = models.ForeignKey(
+        Client, on_delete=models.CASCADE, related_name="archived_messages"
+    )
+    celery_task_id = models.CharField(max_length=36, blank=True, null=True)
+    scheduled_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-id"]
+
+
+class MailingSchedule(
+    ExportModelOperationsMixin("mailing_schedule"), models.Model
+):
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        related_name="mailing_schedules",
+    )
+    time_zone = TimeZoneField(use_pytz=True)
+    send_time = models.DateTimeField(db_index=True)
+    is_released = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["send_time"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["mailing", "time_zone"],
+                name="unique_mailing_time_zone",
+            )
+        ]
+
+
+class MessageDailyStats(
+    ExportModelOperationsMixin("message_daily_stats"), models.Model
+):
+    date = models.DateField()
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        related_name="daily_stats",
+    )
+    status = models.CharField(max_length=2, choices=Message.Status.choices)
+    operator_code = models.CharField(max_length=3)
+    count = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["-date", "mailing", "status", "operator_code"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "mailing", "status", "operator_code"],
+                name="unique_message_daily_stats",
+            )
+        ]
+
+
+class RateLimitBucket(
+    ExportModelOperationsMixin("rate_limit_bucket"), models.Model
+):
+    key = models.CharField(max_length=64, unique=True)
+    tokens = models.FloatField()
+    updated_at = models.DateTimeField()
+
+
+MESSAGE_STATUS_COUNTERS = {
+    Message.Status.SCHEDULED: "scheduled_messages",
+    Message.Status.DELIVERED: "delivered_messages",
+    Message.Status.NOT_DELIVERED: "undelivered_messages",
+    Message.Status.CANCELLED: "cancelled_messages",
+}
@@ -0,0 +1,43 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class IdCursorPagination(CursorPagination):
+    ordering = "-id"
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.MAX_PAGE_SIZE
+
+
+class MessageCursorPagination(IdCursorPagination):
+    ordering = "id"
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Page number pagination, or keyset pagination by ID with
+    "?pagination=cursor".
+
+    Page number pagination counts the objects and skips the previous pages
+    with OFFSET, so deep pages of big tables get slow. Cursor pages are
+    fetched equally fast at any depth, but have no count or page numbers.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = settings.MAX_PAGE_SIZE
+    pagination_query_param = "pagination"
+    cursor_pagination_class = IdCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_pagination = None
+        if request.query_params.get(self.pagination_query_param) == "cursor":
+            self.cursor_pagination = self.cursor_pagination_class()
+            return self.cursor_pagination.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_pagination:
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.models import RateLimitBucket
+
+logger = logging.getLogger("api")
+
+
+def take_token(tokens, elapsed, rate):
+    """
+    Refill a token bucket and take a token from it.
+
+    The bucket holds at least one token, so rates below one token per second
+    are supported.
+
+    Args:
+        tokens (float): The tokens left in the bucket.
+        elapsed (float): The time (in sec) since the bucket was updated.
+        rate (float): The number of tokens added to the bucket per second.
+
+    Returns:
+        tuple: The tokens left in the bucket and the time (in sec) to wait
+        before the next attempt, 0 if the token was taken.
+    """
+    tokens = min(max(rate, 1), tokens + max(elapsed, 0) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / rate
+
+
+class LocalStore:
+    """
+    Token buckets kept in the memory of the current process.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def consume(self, key, rate):
+        """
+        Take a token from the bucket.
+
+        Args:
+            key (str): The bucket name.
+            rate (float): The number of tokens added to the bucket per second.
+
+        Returns:
+            float: The time (in sec) to wait before the next attempt, 0 if the
+            token was taken.
+        """
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated_at = self.buckets.get(key, (max(rate, 1), now))
+            tokens, wait = take_token(tokens, now - updated_at, rate)
+            self.buckets[key] = (tokens, now)
+            return wait
+
+
+class DatabaseStore:
+    """
+    Token buckets shared by all workers through the database.
+
+    A bucket row is locked while a token is taken from it, so the limit is
+    exact, at the cost of a short transaction per message.
+    """
+
+    def consume(self, key, rate):
+        now = timezone.now()
+        with transaction.atomic():
+            (
+                bucket,
+                created,
+            ) = RateLimitBucket.objects.select_for_update().get_or_create(
+                key=key,
+                defaults={"tokens": max(rate, 1), "updated_at": now},
+            )
+            elapsed = (now - bucket.updated_at).total_seconds()
+            bucket.tokens, wait = take_token(bucket.tokens, elapsed, rate)
+            bucket.updated_at = max(now, bucket.updated_at)
+            bucket.save(update_fields=["tokens", "updated_at"])
+        return wait
+
+
+def is_shared_cache(cache_backend):
+    return not isinstance(cache_backend, (LocMemCache, DummyCache))
+
+
+class CacheStore:
+    """
+    Sliding windows shared by all workers through the Django cache.
+
+    The count of the previous window is weighted by its overlap with the
+    window ending now, so bursts at the window edges are not let through.
+    The cache must be shared by the workers and support atomic increments
+    (Redis, Memcached). The in-process store is used while the cache is
+    unavailable.
+    """
+
+    def __init__(self):
+        if not is_shared_cache(caches["default"]):
+            raise ImproperlyConfigured(
+                "api.ratelimit.CacheStore needs a cache shared by the "
+                "workers, set CACHE_LOCATION"
+            )
+        self.fallback = LocalStore()
+
+    def consume(self, key, rate):
+        period = max(1, 1 / rate)
+        limit = max(rate, 1)
+        now = time.time()
+        window = int(now // period)
+        elapsed = now - window * period
+        current_key = f"ratelimit:{key}:{window}"
+        try:
+            cache.add(current_key, 0, timeout=int(period * 2) + 1)
+            count = cache.incr(current_key)
+            previous = cache.get(f"ratelimit:{key}:{window - 1}", 0)
+            weight = 1 - elapsed / period
+            if previous * weight + count <= limit:
+                return 0
+            count = cache.decr(current_key)
+        except Exception as e:
+            logger.warning(f"Rate limit cache is unavailable. Error: {e}")
+            return self.fallback.consume(key, rate)
+        if count + 1 > limit:
+            return period - elapsed
+        # Wait until the weight of the previous window leaves room
+        return (previous * weight + count + 1 - limit) * period / previous
+
+
+class RateLimiter:
+    def __init__(self, store, rate=None, operator_rates=None):
+        self.store = store
+        self.rate = rate
+        self.operator_rates = operator_rates or {}
+
+    def get_limits(self, operator_code=None):
+        limits = []
+        if operator_code in self.operator_rates:
+            limits.append(
+                (
+                    f"operator:{operator_code}",
+                    self.operator_rates[operator_code],
+                )
+            )
+        if self.rate:
+            limits.append(("global", self.rate))
+        return limits
+
+    def acquire(self, operator_code=None):
+        """
+        Block until a message to the operator can be sent.
+
+        Args:
+            operator_code (str, optional): The client's operator code.
+                Defaults to None.
+        """
+        for key, rate in self.get_limits(operator_code):
+            while wait := self.store.consume(key, rate):
+                time.sleep(wait)
+
+
+def get_rate_limiter():
+    """
+    Build the rate limiter of outbound gateway traffic from the settings.
+
+    Returns:
+        RateLimiter: The rate limiter, None if no limits are set.
+    """
+    if not settings.API_RATE_LIMIT and not settings.API_OPERATOR_RATE_LIMITS:
+        return None
+    store_class = import_string(settings.API_RATE_LIMIT_STORE)
+    return RateLimiter(
+        store=store_class(),
+        rate=settings.API_RATE_LIMIT,
+        operator_rates=settings.API_OPERATOR_RATE_LIMITS,
+    )
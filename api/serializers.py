@@ -1,11 +1,12 @@
 from datetime import datetime as dt
 
 import pytz
-from django.core.validators import RegexValidator
 from rest_framework import serializers
 from timezone_field.rest_framework import TimeZoneSerializerField
 
-from .models import Client, Mailing, Message
+from .filters import compile_client_filter
+from .models import Client, Mailing, Message, MessageDailyStats
+from .validators import phone_validator
 
 
 class ClientSerializer(serializers.ModelSerializer):
@@ -24,12 +25,7 @@ class ClientSerializer(serializers.ModelSerializer):
         ]
 
     phone = serializers.CharField(
-        validators=[
-            RegexValidator(
-                r"^7\d{10}$",
-                message="Enter a valid phone number ('7XXXXXXXXXX')",
-            )
-        ],
+        validators=[phone_validator],
         required=True,
         allow_blank=False,
         allow_null=False,
@@ -39,7 +35,43 @@ class ClientSerializer(serializers.ModelSerializer):
 class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
-        fields = ["id", "datetime_send", "mailing", "client", "status"]
+        fields = [
+            "id",
+            "datetime_send",
+            "mailing",
+            "client",
+            "status",
+            "attempts",
+            "scheduled_at",
+        ]
+
+
+class MessageDailyStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MessageDailyStats
+        fields = ["date", "mailing", "status", "operator_code", "count"]
+
+
+class MessageDailyStatsFilterSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    mailing = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(
+        choices=Message.Status.choices, required=False
+    )
+    operator_code = serializers.CharField(max_length=3, required=False)
+
+
+class MailingProgressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Mailing
+        fields = [
+            "id",
+            "fanout_status",
+            "clients_count",
+            "created_messages",
+            "dispatched_messages",
+        ]
 
 
 class MailingSerializer(serializers.ModelSerializer):
@@ -59,10 +91,20 @@ class MailingSerializer(serializers.ModelSerializer):
             "delivered_messages",
             "undelivered_messages",
             "cancelled_messages",
+            "dispatched_messages",
+            "fanout_status",
             "created_at",
             "updated_at",
         ]
 
+    def validate_client_filter(self, value):
+        if value:
+            try:
+                compile_client_filter(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
     def validate(self, data):
         datetime_start = (
             data.get("datetime_start") or self.instance.datetime_start
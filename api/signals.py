@@ -1,5 +1,7 @@
 import logging
+import random
 
+from django.conf import settings
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
@@ -8,49 +10,101 @@ from .models import Client, Mailing, Message
 logger = logging.getLogger("api")
 
 
+def get_instance_fields(instance):
+    return {
+        key: value
+        for key, value in instance.__dict__.items()
+        if not key.startswith("_")
+    }
+
+
+def log_instance_change(sender, instance, action):
+    """
+    Log a change of a model instance at the level configured for the model.
+
+    Changes are sampled with the rate configured for the model, and the
+    message is formatted by the logging thread only if it is logged.
+
+    Args:
+        sender (type): The model class.
+        instance (Model): The changed model instance.
+        action (str): The change, "created", "updated" or "deleted".
+    """
+    model_name = sender.__name__
+    level = logging.getLevelName(
+        settings.SIGNALS_LOG_LEVELS.get(model_name, "INFO")
+    )
+    if not logger.isEnabledFor(level):
+        return
+    sample_rate = settings.SIGNALS_LOG_SAMPLE_RATES.get(model_name, 1)
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return
+    extra = {"model": model_name, "object_id": instance.id, "action": action}
+    if action == "deleted":
+        logger.log(
+            level, "%s_%s deleted", model_name, instance.id, extra=extra
+        )
+        return
+    logger.log(
+        level,
+        "%s_%s %s. Attributes: %s",
+        model_name,
+        instance.id,
+        action,
+        get_instance_fields(instance),
+        extra=extra,
+    )
+
+
 @receiver(post_save, sender=Message)
 def update_messages_info_handler(
     sender, instance, update_fields, created, **kwargs
 ):
-    if created or update_fields and "status" in update_fields:
-        mailing = instance.mailing
-        mailing.update_messages_info()
+    if instance.mailing_id is None:
+        return
+    if created:
+        Mailing.update_messages_counters(
+            instance.mailing_id, new_status=instance.status
+        )
+    elif instance._loaded_status and (
+        update_fields is None or "status" in update_fields
+    ):
+        Mailing.update_messages_counters(
+            instance.mailing_id,
+            old_status=instance._loaded_status,
+            new_status=instance.status,
+        )
+    instance._loaded_status = instance.status
 
 
 @receiver(post_save, sender=Mailing)
 def mailing_create_or_update_handler(sender, instance, created, **kwargs):
     action = "created" if created else "updated"
-    logger.info(
-        f"{sender.__name__}_{instance.id} {action}. Attributes: {instance.__dict__}"
-    )
+    log_instance_change(sender, instance, action)
 
 
 @receiver(post_save, sender=Client)
 def client_create_or_update_handler(sender, instance, created, **kwargs):
     action = "created" if created else "updated"
-    logger.info(
-        f"{sender.__name__}_{instance.id} {action}. Attributes: {instance.__dict__}"
-    )
+    log_instance_change(sender, instance, action)
 
 
 @receiver(post_save, sender=Message)
 def message_create_or_update_handler(sender, instance, created, **kwargs):
     action = "created" if created else "updated"
-    logger.info(
-        f"{sender.__name__}_{instance.id} {action}. Attributes: {instance.__dict__}"
-    )
+    log_instance_change(sender, instance, action)
 
 
 @receiver(post_delete, sender=Mailing)
 def mailing_delete_handler(sender, instance, **kwargs):
-    logger.info(f"{sender.__name__}_{instance.id} deleted")
+    log_instance_change(sender, instance, "deleted")
 
 
 @receiver(post_delete, sender=Client)
 def client_delete_handler(sender, instance, **kwargs):
-    logger.info(f"{sender.__name__}_{instance.id} deleted")
+    log_instance_change(sender, instance, "deleted")
 
 
 @receiver(post_delete, sender=Message)
 def message_delete_handler(sender, instance, **kwargs):
-    logger.info(f"{sender.__name__}_{instance.id} deleted")
+    log_instance_change(sender, instance, "deleted")
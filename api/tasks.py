@@ -1,77 +1,364 @@
 import logging
+import random
+import time
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-import requests
-from celery import current_app, shared_task
+from celery import shared_task
+from celery.utils import uuid
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models import Count
+from django.db.models import F, Sum
 from django.utils import timezone
 from dotenv import load_dotenv
-from requests.exceptions import HTTPError, RequestException, Timeout
+from requests.exceptions import HTTPError, RequestException
 from tabulate import SEPARATING_LINE, tabulate
 
-from api.utils import get_message_send_time
+from api.gateway import get_gateway_client
+from api.utils import (
+    archive_ended_mailings,
+    chunked,
+    get_message_send_time,
+    get_time_zone_send_time,
+    get_time_zones_send_times,
+    refresh_message_daily_stats,
+    update_messages_status,
+)
 
-from .models import Message
+from .models import Mailing, MailingSchedule, Message, MessageDailyStats
 
 logger = logging.getLogger("api")
 
 load_dotenv()
 
-api_url = settings.API_URL
-api_token = settings.API_TOKEN
 email_host_user = settings.EMAIL_HOST_USER
 recipient_list = list(settings.EMAIL_RECIPIENTS.values())
 
 
 class TaskManager:
     @staticmethod
-    def create_message_celery_task(message):
-        message_send_time = get_message_send_time(
-            message.mailing, message.client
+    def get_send_time_groups(mailing, batch_size):
+        messages = Message.objects.filter(
+            mailing=mailing, status=Message.Status.SCHEDULED
+        ).values_list("id", "client__time_zone")
+        time_zones_send_times = {}
+        send_time_groups = defaultdict(list)
+        for message_id, time_zone in messages.iterator(chunk_size=batch_size):
+            if time_zone not in time_zones_send_times:
+                time_zones_send_times[time_zone] = get_time_zone_send_time(
+                    mailing, time_zone
+                )
+            send_time_groups[time_zones_send_times[time_zone]].append(
+                message_id
+            )
+        send_time_groups.pop(None, None)
+        return send_time_groups
+
+    @staticmethod
+    def create_mailing_message_celery_tasks(mailing, batch_size=None):
+        batch_size = batch_size or settings.MESSAGES_BATCH_SIZE
+        send_time_groups = TaskManager.get_send_time_groups(
+            mailing, batch_size
         )
-        task = send_mailing.apply_async(
-            args=[message.id], eta=message_send_time
+        for message_send_time, message_ids in send_time_groups.items():
+            for batch in chunked(message_ids, batch_size):
+                TaskManager.create_message_celery_tasks(
+                    mailing, batch, message_send_time
+                )
+                Mailing.update_dispatched_messages(mailing.id, len(batch))
+
+    @staticmethod
+    def create_mailing_batch_celery_tasks(mailing, batch_size=None):
+        batch_size = batch_size or settings.MESSAGES_BATCH_SIZE
+        send_time_groups = TaskManager.get_send_time_groups(
+            mailing, batch_size
         )
-        celery_task_id = task.id
-        message.celery_task_id = celery_task_id
-        message.save(update_fields=["celery_task_id"])
+        for message_send_time, message_ids in send_time_groups.items():
+            for batch in chunked(message_ids, batch_size):
+                TaskManager.create_batch_celery_task(
+                    mailing, batch, message_send_time
+                )
+                Mailing.update_dispatched_messages(mailing.id, len(batch))
 
     @staticmethod
-    def delete_message_celery_task(message):
-        celery_task_id = message.celery_task_id
-        task_state = current_app.AsyncResult(celery_task_id).state
-        if task_state not in ("SUCCESS", "FAILURE", "REVOKED"):
-            current_app.control.revoke(celery_task_id, terminate=True)
-        message.status = Message.Status.CANCELLED
-        message.save(update_fields=["status"])
+    def create_batch_celery_task(mailing, message_ids, message_send_time):
+        celery_task_id = uuid()
+        Message.objects.filter(id__in=message_ids).update(
+            celery_task_id=celery_task_id, scheduled_at=message_send_time
+        )
+        send_mailing_batch.apply_async(
+            args=[message_ids],
+            kwargs=get_task_kwargs(mailing, message_send_time),
+            eta=message_send_time,
+            task_id=celery_task_id,
+        )
 
     @staticmethod
-    def update_message_celery_task(message):
-        TaskManager.create_new_message_and_send(message)
-        TaskManager.delete_message_celery_task(message)
+    def reschedule_mailing_messages(mailing, batch_size=None):
+        batch_size = batch_size or settings.MESSAGES_BATCH_SIZE
+        messages = Message.objects.filter(
+            mailing=mailing, status=Message.Status.SCHEDULED
+        )
+        time_zones_send_times = get_time_zones_send_times(
+            mailing,
+            messages.order_by()
+            .values_list("client__time_zone", flat=True)
+            .distinct(),
+        )
+        closed_time_zones = [
+            time_zone
+            for time_zone, send_time in time_zones_send_times.items()
+            if not send_time
+        ]
+        if closed_time_zones:
+            now = timezone.now()
+            cancelled_messages = messages.filter(
+                client__time_zone__in=closed_time_zones
+            ).update(
+                status=Message.Status.CANCELLED,
+                datetime_send=now,
+                updated_at=now,
+            )
+            Mailing.update_messages_counters(
+                mailing.id,
+                old_status=Message.Status.SCHEDULED,
+                new_status=Message.Status.CANCELLED,
+                count=cancelled_messages,
+            )
+        if settings.MESSAGES_DISPATCH_MODE == "bucket":
+            MailingSchedule.objects.filter(
+                mailing=mailing, is_released=False
+            ).delete()
+            TaskManager.create_mailing_schedules(mailing)
+            return 0
+        rescheduled_messages = 0
+        for time_zone, message_send_time in time_zones_send_times.items():
+            if not message_send_time:
+                continue
+            message_ids = (
+                messages.filter(client__time_zone=time_zone)
+                .exclude(scheduled_at=message_send_time)
+                .values_list("id", flat=True)
+            )
+            # Previous tasks of the rescheduled messages skip them, as the
+            # send time they were created for no longer matches. Rescheduled
+            # messages drop out of the query.
+            while batch := list(message_ids[:batch_size]):
+                if settings.MESSAGES_DISPATCH_MODE == "batch":
+                    TaskManager.create_batch_celery_task(
+                        mailing, batch, message_send_time
+                    )
+                else:
+                    TaskManager.create_message_celery_tasks(
+                        mailing, batch, message_send_time
+                    )
+                rescheduled_messages += len(batch)
+        return rescheduled_messages
 
     @staticmethod
-    def create_new_message_and_send(message, interval=0):
-        message_send_time = get_message_send_time(
-            message.mailing, message.client, interval=interval
+    def create_message_celery_tasks(mailing, message_ids, message_send_time):
+        messages = [
+            Message(
+                id=message_id,
+                celery_task_id=uuid(),
+                scheduled_at=message_send_time,
+            )
+            for message_id in message_ids
+        ]
+        Message.objects.bulk_update(
+            messages, ["celery_task_id", "scheduled_at"]
         )
-        if message_send_time and message.status != Message.Status.DELIVERED:
-            new_message = Message.objects.create(
-                client=message.client,
-                mailing=message.mailing,
+        for message in messages:
+            send_mailing.apply_async(
+                args=[message.id],
+                kwargs=get_task_kwargs(mailing, message_send_time),
+                eta=message_send_time,
+                task_id=message.celery_task_id,
             )
-            task = send_mailing.apply_async(
-                args=[new_message.id], eta=message_send_time
+
+    @staticmethod
+    def create_mailing_schedules(mailing):
+        time_zones = (
+            Message.objects.filter(
+                mailing=mailing, status=Message.Status.SCHEDULED
             )
-            celery_task_id = task.id
-            new_message.celery_task_id = celery_task_id
-            new_message.save(update_fields=["celery_task_id"])
+            .order_by()
+            .values_list("client__time_zone", flat=True)
+            .distinct()
+        )
+        time_zones_send_times = get_time_zones_send_times(mailing, time_zones)
+        MailingSchedule.objects.bulk_create(
+            [
+                MailingSchedule(
+                    mailing=mailing, time_zone=time_zone, send_time=send_time
+                )
+                for time_zone, send_time in time_zones_send_times.items()
+                if send_time
+            ],
+            # Time zones of a rescheduled mailing may be already released
+            ignore_conflicts=True,
+        )
+        # Messages are tied to the schedule of their client's current time
+        # zone, so a later change of the time zone does not leave them
+        # unreleased
+        schedules = MailingSchedule.objects.filter(
+            mailing=mailing, is_released=False
+        )
+        for schedule in schedules:
+            Message.objects.filter(
+                mailing=mailing,
+                status=Message.Status.SCHEDULED,
+                schedule__isnull=True,
+                client__time_zone=schedule.time_zone,
+            ).update(schedule=schedule)
+
+    @staticmethod
+    def release_mailing_schedule(schedule, batch_size=None):
+        batch_size = batch_size or settings.MESSAGES_BATCH_SIZE
+        messages = Message.objects.filter(
+            schedule=schedule,
+            status=Message.Status.SCHEDULED,
+            celery_task_id__isnull=True,
+        ).order_by("id")
+        # Each batch is claimed by its task ID before it is dispatched and
+        # the schedule is marked as released only after all the batches are
+        # dispatched, so a failed release is resumed by the next run
+        while message_ids := list(
+            messages.values_list("id", flat=True)[:batch_size]
+        ):
+            celery_task_id = uuid()
+            messages.filter(id__in=message_ids).update(
+                celery_task_id=celery_task_id
+            )
+            batch = list(
+                Message.objects.filter(
+                    id__in=message_ids, celery_task_id=celery_task_id
+                ).values_list("id", flat=True)
+            )
+            if not batch:
+                continue
+            try:
+                send_mailing_batch.apply_async(
+                    args=[batch],
+                    kwargs=get_task_kwargs(schedule.mailing),
+                    task_id=celery_task_id,
+                )
+            except Exception:
+                Message.objects.filter(id__in=batch).update(
+                    celery_task_id=None
+                )
+                raise
+            Mailing.update_dispatched_messages(schedule.mailing_id, len(batch))
+        MailingSchedule.objects.filter(id=schedule.id).update(is_released=True)
+
+    @staticmethod
+    def cancel_mailing_messages(mailing):
+        mailing.increment_version()
+        now = timezone.now()
+        cancelled_messages = Message.objects.filter(
+            mailing=mailing, status=Message.Status.SCHEDULED
+        ).update(
+            status=Message.Status.CANCELLED, datetime_send=now, updated_at=now
+        )
+        Mailing.update_messages_counters(
+            mailing.id,
+            old_status=Message.Status.SCHEDULED,
+            new_status=Message.Status.CANCELLED,
+            count=cancelled_messages,
+        )
+        return cancelled_messages
+
+    @staticmethod
+    def schedule_message_retry(message):
+        if message.attempts >= settings.API_RETRY_MAX_ATTEMPTS:
+            return False
+        message_send_time = get_message_send_time(
+            message.mailing,
+            message.client,
+            interval=get_retry_delay(message.attempts),
+        )
+        if (
+            not message_send_time
+            or message_send_time > message.mailing.datetime_end
+        ):
+            return False
+        task = send_mailing.apply_async(
+            args=[message.id],
+            kwargs=get_task_kwargs(message.mailing, message_send_time),
+            eta=message_send_time,
+        )
+        message.celery_task_id = task.id
+        message.scheduled_at = message_send_time
+        return True
 
 
 task_manager = TaskManager()
 
 
+# Cached mailing versions by mailing ID, least recently used first
+mailing_versions = OrderedDict()
+
+
+def get_task_kwargs(mailing, scheduled_at=None):
+    return {
+        "mailing_id": mailing.id,
+        "mailing_version": mailing.version,
+        "scheduled_at": scheduled_at and scheduled_at.isoformat(),
+    }
+
+
+def is_mailing_version_outdated(mailing_id, mailing_version):
+    """
+    Check whether a task was created for an outdated version of the mailing.
+
+    Versions only grow, so a cached version is refreshed from the database
+    only when it expires or is lower than the version of the task.
+    The cache keeps at most MAILING_VERSION_CACHE_SIZE mailings and evicts
+    the least recently used one first.
+
+    Args:
+        mailing_id (int): The mailing ID.
+        mailing_version (int): The mailing version the task was created for.
+
+    Returns:
+        bool: True if the mailing was changed or deleted after the task was
+        created.
+    """
+    if mailing_version is None:
+        return False
+    now = time.monotonic()
+    version, expires_at = mailing_versions.get(mailing_id, (None, 0))
+    if version is None or version < mailing_version or expires_at < now:
+        version = (
+            Mailing.objects.filter(id=mailing_id)
+            .values_list("version", flat=True)
+            .first()
+        )
+        mailing_versions[mailing_id] = (
+            version,
+            now + settings.MAILING_VERSION_CACHE_TTL,
+        )
+    mailing_versions.move_to_end(mailing_id)
+    while len(mailing_versions) > settings.MAILING_VERSION_CACHE_SIZE:
+        mailing_versions.popitem(last=False)
+    return version != mailing_version
+
+
+def get_retry_delay(attempt):
+    backoff = min(
+        settings.API_RETRY_BACKOFF_MAX,
+        settings.API_RETRY_BACKOFF_BASE * 2 ** max(attempt - 1, 0),
+    )
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def is_retryable_error(error):
+    if isinstance(error, HTTPError) and error.response is not None:
+        return error.response.status_code in settings.API_RETRY_STATUS_CODES
+    return isinstance(error, RequestException)
+
+
 def get_mailings_stats(queryset):
     stats = {}
     for group in queryset:
@@ -84,71 +371,240 @@ def get_mailings_stats(queryset):
     return stats
 
 
+def send_message(message):
+    if message.status != Message.Status.SCHEDULED:
+        logger.info(
+            f"Message_{message.id} (Mailing_{message.mailing_id} to Client_{message.client_id} was skipped. Status: {message.get_status_display()}"
+        )
+        return
+    message.attempts += 1
+    try:
+        logger.info(
+            f"Sending request to external service. Message_{message.id} (Mailing_{message.mailing.id}) to Client_{message.client.id}"
+        )
+        response = get_gateway_client().send(
+            message.id, message.client.phone, message.mailing.text
+        )
+        logger.info(
+            f"Message_{message.id} (Mailing_{message.mailing.id} to Client_{message.client.id} was sent successfully. Status code: {response.status_code}"
+        )
+        message.status = Message.Status.DELIVERED
+    except RequestException as e:
+        logger.error(
+            f"Message_{message.id} (Mailing_{message.mailing.id} to Client_{message.client.id} was sent unsuccessfully. Attempt: {message.attempts}. Error: {e}"
+        )
+        if not (
+            is_retryable_error(e)
+            and task_manager.schedule_message_retry(message)
+        ):
+            message.status = Message.Status.NOT_DELIVERED
+    except Exception as e:
+        logger.warning(
+            f"Message_{message.id} (Mailing_{message.mailing.id} to Client_{message.client.id} was sent unsuccessfully. Unexpected error: {e}"
+        )
+        message.status = Message.Status.NOT_DELIVERED
+    finally:
+        # auto_now fields are saved only when listed, and the daily stats
+        # are refreshed by updated_at
+        message.save(
+            update_fields=[
+                "status",
+                "attempts",
+                "celery_task_id",
+                "scheduled_at",
+                "datetime_send",
+                "updated_at",
+            ]
+        )
+
+
+@shared_task(acks_late=True, name="Mailing fan-out")
+def fanout_mailing(mailing_id):
+    # Imported here since the message handler depends on this module
+    from api.handlers.message_handler import MessageHandler
+
+    mailing = Mailing.objects.get(id=mailing_id)
+    if mailing.fanout_status == Mailing.FanoutStatus.DONE:
+        return
+    mailing.set_fanout_status(Mailing.FanoutStatus.IN_PROGRESS)
+    try:
+        MessageHandler().create_messages(mailing_id)
+    except Exception as e:
+        logger.error(f"Mailing_{mailing_id} fan-out failed. Error: {e}")
+        mailing.set_fanout_status(Mailing.FanoutStatus.FAILED)
+        raise
+
+
 @shared_task(bind=True, acks_late=True, name="Mailing")
-def send_mailing(self, message_id):
+def send_mailing(
+    self, message_id, mailing_id=None, mailing_version=None, scheduled_at=None
+):
+    if is_mailing_version_outdated(mailing_id, mailing_version):
+        logger.info(
+            f"Message_{message_id} was skipped. Mailing_{mailing_id} version {mailing_version} is outdated"
+        )
+        return
     try:
         message = Message.objects.get(id=message_id)
-        try:
-            api_data = {
-                "id": message.id,
-                "phone": message.client.phone,
-                "text": message.mailing.text,
-            }
-            headers = {
-                "Authorization": api_token,
-            }
-            response = requests.post(
-                api_url + str(api_data["id"]), json=api_data, headers=headers
-            )
+        if scheduled_at and message.scheduled_at != datetime.fromisoformat(
+            scheduled_at
+        ):
             logger.info(
-                f"Sending request to external service. Message_{message.id} (Mailing_{message.mailing.id}) to Client_{message.client.id}"
+                f"Message_{message_id} was skipped. It was rescheduled to {message.scheduled_at}"
             )
-            response.raise_for_status()
-            logger.info(
-                f"Message_{message.id} (Mailing_{message.mailing.id} to Client_{message.client.id} was sent successfully. Status code: {response.status_code}"
+            return
+        send_message(message)
+    except Message.DoesNotExist as e:
+        logger.error(f"Message_{message_id} error: {e}")
+        self.retry(exc=e, countdown=10)
+
+
+def send_messages_concurrently(messages, concurrency):
+    """
+    Send the messages to the gateway from a pool of threads.
+
+    Rate limit tokens are taken on the calling thread before a message is
+    handed over to the pool, so the pool threads do not open database
+    connections of their own.
+
+    Args:
+        messages (list): The messages to send.
+        concurrency (int): The number of requests kept in flight.
+
+    Returns:
+        list: The message, the response and the error of every request.
+    """
+    gateway_client = get_gateway_client()
+    rate_limiter = gateway_client.rate_limiter
+    futures = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for message in messages:
+            if rate_limiter:
+                rate_limiter.acquire(operator_code=message.client.phone[1:4])
+            futures.append(
+                executor.submit(
+                    gateway_client.send,
+                    message.id,
+                    message.client.phone,
+                    message.mailing.text,
+                    rate_limited=False,
+                )
             )
-            message.status = Message.Status.DELIVERED
-        except (Timeout, HTTPError, RequestException) as e:
-            logger.error(
-                f"Message_{message.id} (Mailing_{message.mailing.id} to Client_{message.client.id} was sent unsuccessfully. Error: {e}"
+    results = []
+    for message, future in zip(messages, futures):
+        try:
+            results.append((message, future.result(), None))
+        except Exception as e:
+            results.append((message, None, e))
+    return results
+
+
+@shared_task(acks_late=True, name="Mailing batch")
+def send_mailing_batch(
+    message_ids, mailing_id=None, mailing_version=None, scheduled_at=None
+):
+    if is_mailing_version_outdated(mailing_id, mailing_version):
+        logger.info(
+            f"{len(message_ids)} messages were skipped. Mailing_{mailing_id} version {mailing_version} is outdated"
+        )
+        return
+    messages = Message.objects.filter(
+        id__in=message_ids, status=Message.Status.SCHEDULED
+    )
+    if scheduled_at:
+        # Rescheduled messages are sent by their new tasks
+        messages = messages.filter(
+            scheduled_at=datetime.fromisoformat(scheduled_at)
+        )
+    messages = list(messages.select_related("mailing", "client"))
+    if not messages:
+        return
+    logger.info(
+        f"Sending {len(messages)} requests to external service. Mailing_{messages[0].mailing_id}"
+    )
+    results = send_messages_concurrently(messages, settings.API_CONCURRENCY)
+    Message.objects.filter(id__in=[message.id for message in messages]).update(
+        attempts=F("attempts") + 1
+    )
+    delivered_messages = []
+    undelivered_messages = []
+    for message, response, error in results:
+        if error is None:
+            logger.info(
+                f"Message_{message.id} (Mailing_{message.mailing_id} to Client_{message.client_id} was sent successfully. Status code: {response.status_code}"
             )
-            message.status = Message.Status.NOT_DELIVERED
-            task_manager.create_new_message_and_send(message, interval=10)
+            delivered_messages.append(message)
+            continue
+        message.attempts += 1
+        logger.error(
+            f"Message_{message.id} (Mailing_{message.mailing_id} to Client_{message.client_id} was sent unsuccessfully. Attempt: {message.attempts}. Error: {error}"
+        )
+        if is_retryable_error(error) and task_manager.schedule_message_retry(
+            message
+        ):
+            message.save(update_fields=["celery_task_id", "scheduled_at"])
+        else:
+            undelivered_messages.append(message)
+    update_messages_status(delivered_messages, Message.Status.DELIVERED)
+    update_messages_status(undelivered_messages, Message.Status.NOT_DELIVERED)
+
+
+@shared_task(name="Release mailing schedules")
+def release_mailing_schedules():
+    schedules = MailingSchedule.objects.filter(
+        is_released=False, send_time__lte=timezone.now()
+    )
+    for schedule in schedules:
+        try:
+            task_manager.release_mailing_schedule(schedule)
         except Exception as e:
-            logger.warning(
-                f"Message_{message.id} (Mailing_{message.mailing.id} to Client_{message.client.id} was sent unsuccessfully. Unexpected error: {e}"
+            logger.error(
+                f"MailingSchedule_{schedule.id} was not released and will be retried. Error: {e}"
             )
-            message.status = Message.Status.NOT_DELIVERED
-            task_manager.create_new_message_and_send(message, interval=10)
-        finally:
-            message.save(update_fields=["status"])
-    except Message.DoesNotExist as e:
-        logger.error(f"Message_{message_id} error: {e}")
-        self.retry(exc=e, countdown=10)
+
+
+@shared_task(name="Reconcile mailings stats")
+def reconcile_mailings_stats():
+    active_since = timezone.now() - timezone.timedelta(
+        days=settings.MAILINGS_STATS_RECONCILE_DAYS
+    )
+    mailings = Mailing.objects.filter(
+        archived=False, datetime_end__gte=active_since
+    )
+    for mailing in mailings.iterator():
+        mailing.update_messages_info()
+
+
+@shared_task(name="Refresh message daily stats")
+def refresh_message_daily_stats_task():
+    days = refresh_message_daily_stats()
+    logger.info(f"Message daily stats refreshed for {len(days)} days")
+
+
+@shared_task(name="Archive messages")
+def archive_messages_task():
+    archived = archive_ended_mailings()
+    logger.info(
+        f"{sum(archived.values())} messages of {len(archived)} mailings "
+        "archived"
+    )
 
 
 @shared_task(name="Statictics Email")
 def send_daily_statistics_email():
-    yesterday = timezone.now() - timezone.timedelta(days=1)
-    messages = Message.objects.filter(datetime_send__date=yesterday)
-    total_messages = messages.count()
-    scheduled_messages = messages.filter(
-        status=Message.Status.SCHEDULED
-    ).count()
-    delivered_messages = messages.filter(
-        status=Message.Status.DELIVERED
-    ).count()
-    undelivered_messages = messages.filter(
-        status=Message.Status.NOT_DELIVERED
-    ).count()
-    cancelled_messages = messages.filter(
-        status=Message.Status.CANCELLED
-    ).count()
-
-    grouped_messages = messages.values("mailing_id", "status").annotate(
-        message_count=Count("id")
+    yesterday = timezone.localdate() - timezone.timedelta(days=1)
+    refresh_message_daily_stats()
+    grouped_messages = (
+        MessageDailyStats.objects.filter(date=yesterday)
+        .values("mailing_id", "status")
+        .annotate(message_count=Sum("count"))
+        .order_by("mailing_id")
     )
     mailings = get_mailings_stats(grouped_messages)
+    totals = Counter()
+    for mailing_stats in mailings.values():
+        totals.update(mailing_stats)
+    total_messages = sum(totals.values())
 
     table_mailings = [
         [
@@ -175,10 +631,10 @@ def send_daily_statistics_email():
     table_mailings.append(
         [
             "Total",
-            str(scheduled_messages),
-            str(delivered_messages),
-            str(undelivered_messages),
-            str(cancelled_messages),
+            str(totals[Message.Status.SCHEDULED]),
+            str(totals[Message.Status.DELIVERED]),
+            str(totals[Message.Status.NOT_DELIVERED]),
+            str(totals[Message.Status.CANCELLED]),
             str(total_messages),
         ]
     )
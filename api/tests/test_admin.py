@@ -7,7 +7,7 @@ from django.urls import reverse
 from freezegun import freeze_time
 
 from api.admin import mailing_detail
-from api.utils import get_mailing_messages
+from api.models import Message
 
 utc = pytz.UTC
 
@@ -47,12 +47,12 @@ class TestMailingAdmin:
             is False
         )
 
-    @patch("api.admin.TaskManager.update_message_celery_task")
-    @patch("api.admin.TaskManager.create_message_celery_task")
+    @patch("api.admin.TaskManager.reschedule_mailing_messages")
+    @patch("api.admin.message_handler.create_messages")
     def test_save_model_new_obj(
         self,
-        mock_create_message_celery_task,
-        mock_update_message_celery_task,
+        mock_create_messages,
+        mock_reschedule_mailing_messages,
         mailing_admin,
         mailing_instance_one,
         client_instance_one,
@@ -60,17 +60,15 @@ class TestMailingAdmin:
         mailing_admin.save_model(
             request=None, obj=mailing_instance_one, form=None, change=False
         )
-        messages = get_mailing_messages(mailing_instance_one)
-        for message in messages:
-            mock_create_message_celery_task.assert_called_once_with(message)
-        mock_update_message_celery_task.assert_not_called()
+        mock_create_messages.assert_called_once_with(mailing_instance_one.id)
+        mock_reschedule_mailing_messages.assert_not_called()
 
-    @patch("api.admin.TaskManager.update_message_celery_task")
-    @patch("api.admin.TaskManager.create_message_celery_task")
+    @patch("api.admin.TaskManager.reschedule_mailing_messages")
+    @patch("api.admin.message_handler.create_messages")
     def test_save_model_change_obj(
         self,
-        mock_create_message_celery_task,
-        mock_update_message_celery_task,
+        mock_create_messages,
+        mock_reschedule_mailing_messages,
         mailing_admin,
         mailing_instance_one,
         client_instance_one,
@@ -78,21 +76,19 @@ class TestMailingAdmin:
         mailing_admin.save_model(
             request=None, obj=mailing_instance_one, form=None, change=True
         )
-        messages = get_mailing_messages(mailing_instance_one)
-        for message in messages:
-            mock_update_message_celery_task.assert_called_once_with(message)
-        mock_create_message_celery_task.assert_not_called()
+        mock_reschedule_mailing_messages.assert_called_once_with(
+            mailing_instance_one
+        )
+        mock_create_messages.assert_not_called()
 
-    @patch("api.admin.TaskManager.delete_message_celery_task")
     def test_delete_model(
         self,
-        mock_delete_message_celery_task,
         mailing_admin,
         mailing_instance_one,
         client_instance_one,
         message_instance_one,
     ):
-        messages = get_mailing_messages(mailing_instance_one)
         mailing_admin.delete_model(request=None, obj=mailing_instance_one)
-        for message in messages:
-            mock_delete_message_celery_task.assert_called_once_with(message)
+        assert mailing_instance_one.version == 1
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.status == Message.Status.CANCELLED
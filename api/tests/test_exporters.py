@@ -0,0 +1,46 @@
+import gzip
+import json
+
+import pytest
+import pytz
+
+from api.exporters import export_queryset, gzip_chunks, write_csv, write_ndjson
+from api.models import Client
+
+
+def test_write_csv():
+    rows = [(1, "a"), (2, "b,c"), (3, "d")]
+    assert "".join(write_csv(["id", "tag"], rows, chunk_size=2)) == (
+        'id,tag\r\n1,a\r\n2,"b,c"\r\n3,d\r\n'
+    )
+
+
+def test_write_ndjson():
+    rows = [(1, pytz.timezone("Europe/Moscow")), (2, None)]
+    chunks = list(write_ndjson(["id", "time_zone"], rows, chunk_size=1))
+    assert chunks == [
+        '{"id": 1, "time_zone": "Europe/Moscow"}\n',
+        '{"id": 2, "time_zone": null}\n',
+    ]
+
+
+def test_gzip_chunks():
+    data = b"".join(gzip_chunks(["a" * 1000, "b" * 1000]))
+    assert gzip.decompress(data) == b"a" * 1000 + b"b" * 1000
+
+
+@pytest.mark.django_db
+def test_export_queryset(client_instance_one, client_instance_two):
+    data = b"".join(
+        export_queryset(
+            Client.objects.order_by("id"),
+            ["id", "phone"],
+            "ndjson",
+            compress=True,
+        )
+    )
+    rows = [json.loads(line) for line in gzip.decompress(data).splitlines()]
+    assert rows == [
+        {"id": client_instance_one.id, "phone": client_instance_one.phone},
+        {"id": client_instance_two.id, "phone": client_instance_two.phone},
+    ]
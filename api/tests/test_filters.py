@@ -0,0 +1,52 @@
+import pytest
+import pytz
+from django.db.models import Q
+
+from api.filters import compile_client_filter
+from api.models import Client
+
+
+def test_compile_client_filter_plain_tokens():
+    assert compile_client_filter("999, Tag, 123") == Q(
+        operator_code__in=["123", "999"]
+    ) | Q(tag__in=["123", "999", "Tag"])
+
+
+def test_compile_client_filter_empty():
+    assert compile_client_filter(" , ") == Q()
+
+
+@pytest.mark.parametrize("client_filter", ["!", "tag:", "tz:Mars/Base"])
+def test_compile_client_filter_invalid(client_filter):
+    with pytest.raises(ValueError):
+        compile_client_filter(client_filter)
+
+
+@pytest.mark.django_db
+class TestCompileClientFilterQuery:
+    @pytest.fixture(autouse=True)
+    def clients(
+        self, client_instance_one, client_instance_two, client_instance_three
+    ):
+        client_instance_two.time_zone = pytz.timezone("Europe/Moscow")
+        client_instance_two.save()
+        self.client_one = client_instance_one
+        self.client_two = client_instance_two
+        self.client_three = client_instance_three
+
+    def filter_clients(self, client_filter):
+        return set(Client.objects.filter(compile_client_filter(client_filter)))
+
+    def test_and(self):
+        assert self.filter_clients("op:999 & tag:Tag") == {self.client_two}
+
+    def test_not(self):
+        assert self.filter_clients("Tag & !tz:Europe/Moscow") == {
+            self.client_one
+        }
+
+    def test_alternatives(self):
+        assert self.filter_clients("tz:Europe/Moscow, Tag1") == {
+            self.client_two,
+            self.client_three,
+        }
@@ -0,0 +1,62 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from django.test import override_settings
+from requests.exceptions import HTTPError
+
+from api import gateway
+from api.gateway import GatewayClient, get_gateway_client
+
+
+@pytest.fixture
+def gateway_client():
+    return GatewayClient(
+        api_url="https://gateway.test/send/",
+        api_token="token",
+        connect_timeout=1,
+        read_timeout=2,
+        pool_connections=1,
+        pool_maxsize=4,
+    )
+
+
+class TestGatewayClient:
+    def test_pool_size(self, gateway_client):
+        adapter = gateway_client.session.get_adapter("https://gateway.test")
+        assert adapter._pool_maxsize == 4
+        assert gateway_client.session.headers["Authorization"] == "token"
+
+    @patch("requests.Session.post")
+    def test_send(self, mock_post, gateway_client):
+        gateway_client.send(1, "71234567890", "Text")
+        mock_post.assert_called_once_with(
+            "https://gateway.test/send/1",
+            json={"id": 1, "phone": "71234567890", "text": "Text"},
+            timeout=(1, 2),
+        )
+        mock_post.return_value.raise_for_status.assert_called_once()
+
+    @patch("requests.Session.post")
+    def test_send_rate_limited(self, mock_post, gateway_client):
+        gateway_client.rate_limiter = Mock()
+        gateway_client.send(1, "79991234567", "Text")
+        gateway_client.rate_limiter.acquire.assert_called_once_with(
+            operator_code="999"
+        )
+        gateway_client.send(2, "79991234567", "Text", rate_limited=False)
+        gateway_client.rate_limiter.acquire.assert_called_once()
+
+    @patch("requests.Session.post")
+    def test_send_error(self, mock_post, gateway_client):
+        mock_post.return_value.raise_for_status.side_effect = HTTPError()
+        with pytest.raises(HTTPError):
+            gateway_client.send(1, "71234567890", "Text")
+
+
+@override_settings(API_URL="https://gateway.test/send/")
+def test_get_gateway_client():
+    gateway._gateway_client = None
+    client = get_gateway_client()
+    assert client is get_gateway_client()
+    with patch("api.gateway.os.getpid", return_value=-1):
+        assert client is not get_gateway_client()
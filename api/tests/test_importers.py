@@ -0,0 +1,98 @@
+import pytest
+import pytz
+
+from api.importers import (
+    build_client,
+    import_clients,
+    read_clients_csv,
+    read_clients_ndjson,
+)
+from api.models import Client
+
+
+def test_read_clients_csv():
+    lines = ["phone,tag,time_zone\n", "79991234567,VIP,Europe/Moscow\n"]
+    assert list(read_clients_csv(lines)) == [
+        (
+            2,
+            {
+                "phone": "79991234567",
+                "tag": "VIP",
+                "time_zone": "Europe/Moscow",
+            },
+        )
+    ]
+
+
+def test_read_clients_ndjson():
+    lines = ['{"phone": "79991234567"}\n', "\n", "not json\n"]
+    assert list(read_clients_ndjson(lines)) == [
+        (1, {"phone": "79991234567"}),
+        (3, "not json\n"),
+    ]
+
+
+def test_build_client():
+    client, errors = build_client(
+        {"phone": "79991234567", "time_zone": "Europe/Moscow"}
+    )
+    assert errors == {}
+    assert client.operator_code == "999"
+    assert client.tag is None
+    assert client.time_zone == pytz.timezone("Europe/Moscow")
+
+
+@pytest.mark.parametrize(
+    "row, fields",
+    [
+        ({"phone": "89991234567"}, ["phone"]),
+        ({"phone": "79991234567", "tag": "x" * 21}, ["tag"]),
+        ({"phone": "79991234567", "time_zone": "Mars/Base"}, ["time_zone"]),
+        ("not json", ["non_field_errors"]),
+        ({"phone": ["79991234567"]}, ["phone"]),
+        ({"phone": True}, ["phone"]),
+        ({"phone": "79991234567", "tag": 5}, ["tag"]),
+        ({"phone": "79991234567", "time_zone": ["UTC"]}, ["time_zone"]),
+    ],
+)
+def test_build_client_invalid(row, fields):
+    client, errors = build_client(row)
+    assert client is None
+    assert list(errors) == fields
+
+
+def test_build_client_number_phone():
+    client, errors = build_client({"phone": 79991234567})
+    assert errors == {}
+    assert client.phone == "79991234567"
+
+
+@pytest.mark.django_db
+def test_import_clients(client_instance_one):
+    rows = [
+        (1, {"phone": "71234567890", "tag": "New"}),
+        (2, {"phone": "79991234567"}),
+        (3, {"phone": "bad"}),
+        (4, {"phone": "79991234567", "tag": "Last"}),
+    ]
+    result = import_clients(rows, chunk_size=2)
+    assert result["imported"] == 3
+    assert result["failed"] == 1
+    assert result["errors"][0]["line"] == 3
+    assert Client.objects.count() == 2
+    client_instance_one.refresh_from_db()
+    assert client_instance_one.tag == "New"
+    assert Client.objects.get(phone="79991234567").tag == "Last"
+
+
+@pytest.mark.django_db
+def test_import_clients_counts_repeated_phones():
+    rows = [
+        (1, {"phone": "79991234567"}),
+        (2, {"phone": "79991234567", "tag": 5}),
+        (3, {"phone": "79991234567", "tag": "Last"}),
+    ]
+    result = import_clients(rows)
+    assert result["imported"] + result["failed"] == len(rows)
+    assert result["imported"] == 2
+    assert Client.objects.get().tag == "Last"
@@ -0,0 +1,81 @@
+import logging
+from unittest.mock import Mock, patch
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import override_settings
+
+from api.middleware import APILoggingMiddleware, TruncatedBody
+
+
+def test_truncated_body():
+    assert str(TruncatedBody(b"abc", 5)) == "abc"
+    assert str(TruncatedBody(b"abcdef", 3)) == "abc... (truncated)"
+
+
+@pytest.fixture
+def get_response():
+    return Mock(
+        return_value=HttpResponse(
+            b'{"id": 1, "text": "Some text"}',
+            content_type="application/json",
+        )
+    )
+
+
+@override_settings(API_LOG_MAX_BODY_LENGTH=10)
+def test_log_request_and_response(get_response, request_, caplog):
+    request = request_.post(
+        "/api/v1/mailings/",
+        {"text": "Some text"},
+        content_type="application/json",
+    )
+    with caplog.at_level(logging.INFO, logger="api"):
+        APILoggingMiddleware(get_response)(request)
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[0] == (
+        'API Request: POST /api/v1/mailings/, Body: {"text": "... (truncated)'
+    )
+    assert messages[1].startswith(
+        "API Response: POST /api/v1/mailings/, Status Code: 200, Duration: "
+    )
+    assert messages[1].endswith('Body: {"id": 1, ... (truncated)')
+
+
+def test_log_streaming_response(request_, caplog):
+    get_response = Mock(return_value=StreamingHttpResponse(iter([b"a"])))
+    request = request_.post(
+        "/api/v1/clients/import/", "phone\n", content_type="text/csv"
+    )
+    with caplog.at_level(logging.INFO, logger="api"):
+        APILoggingMiddleware(get_response)(request)
+    assert [record.getMessage()[-10:] for record in caplog.records] == [
+        "Body: None",
+        "Body: None",
+    ]
+
+
+@override_settings(API_LOG_EXCLUDED_PATHS=["/metrics", "/docs/"])
+def test_excluded_path(get_response, request_, caplog):
+    with caplog.at_level(logging.INFO, logger="api"):
+        APILoggingMiddleware(get_response)(request_.get("/docs/swagger/"))
+    get_response.assert_called_once()
+    assert not caplog.records
+
+
+@override_settings(API_LOG_SAMPLE_RATE=0.1)
+@patch("api.middleware.random.random", side_effect=[0.5, 0.05])
+def test_sampling(mock_random, get_response, request_, caplog):
+    middleware = APILoggingMiddleware(get_response)
+    with caplog.at_level(logging.INFO, logger="api"):
+        middleware(request_.get("/api/v1/clients/"))
+        assert not caplog.records
+        middleware(request_.get("/api/v1/clients/"))
+    assert len(caplog.records) == 2
+
+
+def test_logger_disabled(get_response, request_, caplog):
+    with caplog.at_level(logging.WARNING, logger="api"):
+        APILoggingMiddleware(get_response)(request_.get("/api/v1/clients/"))
+    get_response.assert_called_once()
+    assert not caplog.records
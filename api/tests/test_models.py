@@ -2,8 +2,11 @@ from datetime import datetime as dt
 
 import pytest
 import pytz
+from django.db import connection
 from freezegun import freeze_time
 
+from api.models import Message
+
 
 @pytest.mark.django_db
 class TestMailingModelTest:
@@ -75,6 +78,26 @@ class TestMailingModelTest:
         assert mailing_instance_one.delivered_messages == 1
         assert mailing_instance_one.undelivered_messages == 0
 
+    def test_messages_counters_on_create(
+        self, mailing_instance_one, message_instance_one, message_instance_two
+    ):
+        mailing_instance_one.refresh_from_db()
+        assert mailing_instance_one.created_messages == 2
+        assert mailing_instance_one.scheduled_messages == 1
+        assert mailing_instance_one.delivered_messages == 1
+
+    def test_messages_counters_on_status_change(
+        self, mailing_instance_one, message_instance_one
+    ):
+        message_instance_one.status = Message.Status.NOT_DELIVERED
+        message_instance_one.save(update_fields=["status"])
+        message_instance_one.status = Message.Status.NOT_DELIVERED
+        message_instance_one.save(update_fields=["status"])
+        mailing_instance_one.refresh_from_db()
+        assert mailing_instance_one.created_messages == 1
+        assert mailing_instance_one.scheduled_messages == 0
+        assert mailing_instance_one.undelivered_messages == 1
+
 
 @freeze_time("2024-01-01 00:00:00")
 @pytest.mark.django_db
@@ -90,3 +113,51 @@ class TestClientModelTest:
             client_instance_one.get_local_time()
             == dt(2024, 1, 1, 5, 0, tzinfo=pytz.UTC).time()
         )
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Query plans are checked on PostgreSQL only",
+)
+class TestMessageIndexes:
+    @pytest.mark.parametrize(
+        "filters, order_by, index",
+        [
+            ({"mailing": 1}, (), "api_message_mailing_status"),
+            (
+                {"mailing": 1, "status": Message.Status.DELIVERED},
+                (),
+                "api_message_mailing_status",
+            ),
+            (
+                {"mailing": 1, "status": Message.Status.SCHEDULED},
+                ("scheduled_at",),
+                "api_message_scheduled",
+            ),
+            (
+                {
+                    "status": Message.Status.DELIVERED,
+                    "created_at__gte": dt(2024, 1, 1, tzinfo=pytz.UTC),
+                },
+                (),
+                "api_message_status_created",
+            ),
+            (
+                {
+                    "created_at__gte": dt(2024, 1, 1, tzinfo=pytz.UTC),
+                    "created_at__lt": dt(2024, 1, 2, tzinfo=pytz.UTC),
+                },
+                (),
+                "api_message_created_at",
+            ),
+        ],
+    )
+    def test_message_queries_use_indexes(self, filters, order_by, index):
+        # The table is empty, so sequential scans are disabled to see
+        # which indexes the planner can use. The default ordering is
+        # cleared, otherwise a backward scan of the primary key would do
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = Message.objects.filter(**filters).order_by(*order_by).explain()
+        assert index in plan
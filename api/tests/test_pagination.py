@@ -0,0 +1,51 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+api_client = APIClient()
+
+
+@pytest.mark.django_db
+class TestPageNumberOrCursorPagination:
+    @pytest.fixture(autouse=True)
+    def clients(
+        self, client_instance_one, client_instance_two, client_instance_three
+    ):
+        return [
+            client_instance_three,
+            client_instance_two,
+            client_instance_one,
+        ]
+
+    def test_page_number(self, clients):
+        response = api_client.get(
+            reverse("api:client-list"), {"page_size": 2, "page": 2}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 3
+        assert [c["id"] for c in response.data["results"]] == [clients[2].id]
+
+    def test_cursor(self, clients):
+        response = api_client.get(
+            reverse("api:client-list"),
+            {"pagination": "cursor", "page_size": 2},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert "count" not in response.data
+        assert [c["id"] for c in response.data["results"]] == [
+            clients[0].id,
+            clients[1].id,
+        ]
+        response = api_client.get(response.data["next"])
+        assert [c["id"] for c in response.data["results"]] == [clients[2].id]
+        assert response.data["next"] is None
+
+    def test_cursor_mailings(self, mailing_instance_one, mailing_instance_two):
+        response = api_client.get(
+            reverse("api:mailing-list"), {"pagination": "cursor"}
+        )
+        assert [m["id"] for m in response.data["results"]] == [
+            mailing_instance_two.id,
+            mailing_instance_one.id,
+        ]
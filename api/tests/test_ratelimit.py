@@ -0,0 +1,139 @@
+from datetime import datetime as dt
+from unittest.mock import Mock, patch
+
+import pytest
+import pytz
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+from freezegun import freeze_time
+
+from api.ratelimit import (
+    CacheStore,
+    DatabaseStore,
+    LocalStore,
+    RateLimiter,
+    get_rate_limiter,
+)
+
+
+class TestLocalStore:
+    @patch("api.ratelimit.time.monotonic", return_value=100.0)
+    def test_consume(self, mock_monotonic):
+        store = LocalStore()
+        assert store.consume("global", 2) == 0
+        assert store.consume("global", 2) == 0
+        assert store.consume("global", 2) == pytest.approx(0.5)
+        mock_monotonic.return_value = 100.5
+        assert store.consume("global", 2) == 0
+        assert store.consume("operator:999", 2) == 0
+
+    @patch("api.ratelimit.time.monotonic", return_value=100.0)
+    def test_consume_fractional_rate(self, mock_monotonic):
+        store = LocalStore()
+        assert store.consume("global", 0.5) == 0
+        assert store.consume("global", 0.5) == pytest.approx(2)
+        mock_monotonic.return_value = 102.0
+        assert store.consume("global", 0.5) == 0
+
+
+@pytest.mark.django_db
+class TestDatabaseStore:
+    def test_consume(self):
+        store = DatabaseStore()
+        with freeze_time("2024-01-01 00:00:00") as frozen_time:
+            assert store.consume("global", 2) == 0
+            assert store.consume("global", 2) == 0
+            assert store.consume("global", 2) == pytest.approx(0.5)
+            frozen_time.tick(0.5)
+            assert store.consume("global", 2) == 0
+            assert store.consume("operator:999", 2) == 0
+
+    def test_consume_fractional_rate(self):
+        store = DatabaseStore()
+        with freeze_time("2024-01-01 00:00:00") as frozen_time:
+            assert store.consume("global", 0.5) == 0
+            assert store.consume("global", 0.5) == pytest.approx(2)
+            frozen_time.tick(1)
+            assert store.consume("global", 0.5) == pytest.approx(1)
+            frozen_time.tick(1)
+            assert store.consume("global", 0.5) == 0
+
+    @patch("api.ratelimit.time.sleep")
+    def test_acquire_fractional_rate(self, mock_sleep):
+        rate_limiter = RateLimiter(DatabaseStore(), rate=0.5)
+        with freeze_time("2024-01-01 00:00:00") as frozen_time:
+            mock_sleep.side_effect = frozen_time.tick
+            rate_limiter.acquire()
+            rate_limiter.acquire()
+            mock_sleep.assert_called_once_with(pytest.approx(2))
+            assert frozen_time.time_to_freeze == dt(2024, 1, 1, 0, 0, 2)
+
+
+@patch("api.ratelimit.is_shared_cache", return_value=True)
+class TestCacheStore:
+    @patch("api.ratelimit.time.time", return_value=1000.25)
+    def test_consume(self, mock_time, mock_is_shared_cache):
+        store = CacheStore()
+        assert store.consume("global", 1) == 0
+        assert store.consume("global", 1) == pytest.approx(0.75)
+        mock_time.return_value = 1001.5
+        # Half of the previous window is still counted
+        assert store.consume("global", 1) == pytest.approx(0.5)
+        mock_time.return_value = 1002.0
+        assert store.consume("global", 1) == 0
+
+    @patch("api.ratelimit.time.time", return_value=1000.0)
+    def test_consume_fractional_rate(self, mock_time, mock_is_shared_cache):
+        store = CacheStore()
+        assert store.consume("global:0.5", 0.5) == 0
+        assert store.consume("global:0.5", 0.5) == pytest.approx(2)
+        mock_time.return_value = 1002.0
+        assert store.consume("global:0.5", 0.5) == pytest.approx(2)
+        mock_time.return_value = 1004.0
+        assert store.consume("global:0.5", 0.5) == 0
+
+    @patch("api.ratelimit.cache.incr", side_effect=ConnectionError)
+    def test_consume_fallback(self, mock_incr, mock_is_shared_cache):
+        store = CacheStore()
+        assert store.consume("global", 1) == 0
+        assert store.consume("global", 1) > 0
+
+
+def test_cache_store_needs_shared_cache():
+    with pytest.raises(ImproperlyConfigured):
+        CacheStore()
+
+
+class TestRateLimiter:
+    def test_get_limits(self):
+        rate_limiter = RateLimiter(Mock(), rate=10, operator_rates={"999": 2})
+        assert rate_limiter.get_limits("999") == [
+            ("operator:999", 2),
+            ("global", 10),
+        ]
+        assert rate_limiter.get_limits("123") == [("global", 10)]
+        assert RateLimiter(Mock()).get_limits("999") == []
+
+    @patch("api.ratelimit.time.sleep")
+    def test_acquire_waits(self, mock_sleep):
+        store = Mock()
+        store.consume.side_effect = [0.5, 0]
+        RateLimiter(store, rate=1).acquire("999")
+        mock_sleep.assert_called_once_with(0.5)
+
+
+@override_settings(
+    API_RATE_LIMIT=5,
+    API_OPERATOR_RATE_LIMITS={"999": 1},
+    API_RATE_LIMIT_STORE="api.ratelimit.LocalStore",
+)
+def test_get_rate_limiter():
+    rate_limiter = get_rate_limiter()
+    assert isinstance(rate_limiter.store, LocalStore)
+    assert rate_limiter.rate == 5
+    assert rate_limiter.operator_rates == {"999": 1}
+
+
+@override_settings(API_RATE_LIMIT=0, API_OPERATOR_RATE_LIMITS={})
+def test_get_rate_limiter_no_limits():
+    assert get_rate_limiter() is None
@@ -0,0 +1,76 @@
+import logging
+import os
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+
+from api.log import QueueListenerHandler
+from api.models import Client
+
+
+@pytest.mark.django_db
+class TestLogInstanceChange:
+    def test_logged(self, caplog):
+        with caplog.at_level(logging.INFO, logger="api"):
+            client = Client.objects.create(phone="79991234567")
+        record = caplog.records[-1]
+        assert record.getMessage().startswith(f"Client_{client.id} created")
+        assert "_state" not in record.getMessage()
+        assert record.model == "Client"
+        assert record.action == "created"
+
+    @override_settings(SIGNALS_LOG_LEVELS={"Client": "DEBUG"})
+    def test_level(self, caplog):
+        with caplog.at_level(logging.INFO, logger="api"):
+            Client.objects.create(phone="79991234567")
+        assert not caplog.records
+
+    @override_settings(SIGNALS_LOG_SAMPLE_RATES={"Client": 0.5})
+    @patch("api.signals.random.random", side_effect=[0.7, 0.2])
+    def test_sampling(self, mock_random, caplog):
+        with caplog.at_level(logging.INFO, logger="api"):
+            Client.objects.create(phone="79991234567")
+            Client.objects.create(phone="79991234568")
+        assert len(caplog.records) == 1
+        assert "79991234568" in caplog.records[0].getMessage()
+
+
+def test_queue_listener_handler():
+    records = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            records.append(self.format(record))
+
+    handler = QueueListenerHandler([ListHandler()])
+    logger = logging.getLogger("test_queue_listener_handler")
+    logger.addHandler(handler)
+    logger.warning("Message_%s sent", 1)
+    handler.stop()
+    handler.stop()
+    logger.removeHandler(handler)
+    assert records == ["Message_1 sent"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Needs os.fork")
+def test_queue_listener_handler_forked(tmp_path):
+    log_file = tmp_path / "app.log"
+    handler = QueueListenerHandler([logging.FileHandler(log_file)])
+    logger = logging.getLogger("test_queue_listener_handler_forked")
+    logger.addHandler(handler)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            logger.warning("Logged by the child")
+            handler.stop()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    logger.warning("Logged by the parent")
+    handler.stop()
+    logger.removeHandler(handler)
+    assert log_file.read_text().splitlines() == [
+        "Logged by the child",
+        "Logged by the parent",
+    ]
@@ -1,40 +1,354 @@
+import threading
 from datetime import datetime as dt
-from unittest.mock import patch
+from datetime import time
+from unittest.mock import ANY, Mock, call, patch
 
 import pytest
 import pytz
+from django.conf import settings
+from django.test import override_settings
 from freezegun import freeze_time
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import HTTPError
+from tabulate import tabulate
 
-from api.models import Message
+from api.models import Client, Mailing, MailingSchedule, Message
 from api.tasks import (
     TaskManager,
+    fanout_mailing,
     get_mailings_stats,
+    get_retry_delay,
+    is_mailing_version_outdated,
+    is_retryable_error,
+    mailing_versions,
+    reconcile_mailings_stats,
+    release_mailing_schedules,
     send_daily_statistics_email,
     send_mailing,
+    send_mailing_batch,
 )
+from api.utils import update_messages_status
 
 utc = pytz.UTC
 
 
 @pytest.mark.django_db
+@patch("api.tasks.tabulate", wraps=tabulate)
 @patch("api.tasks.send_mail")
-def test_send_daily_statistics_email(mock_send_mail):
-    send_daily_statistics_email()
+def test_send_daily_statistics_email(
+    mock_send_mail, mock_tabulate, mailing_instance_one
+):
+    with freeze_time("2024-01-01 23:59:00"):
+        message = Message.objects.create(
+            mailing=mailing_instance_one,
+            client=Client.objects.create(phone="79991234567"),
+        )
+        Message.objects.create(
+            mailing=mailing_instance_one,
+            client=message.client,
+            status=Message.Status.DELIVERED,
+        )
+        # Messages without a mailing are not counted
+        Message.objects.create(client=message.client)
+    with freeze_time("2024-01-02 00:00:00"):
+        Message.objects.create(
+            mailing=mailing_instance_one, client=message.client
+        )
+        # Messages are counted on the day they were created on, whenever
+        # they were sent
+        update_messages_status([message], Message.Status.DELIVERED)
+        send_daily_statistics_email()
     mock_send_mail.assert_called_once()
+    text = mock_send_mail.call_args.kwargs["message"]
+    assert text.startswith("2 messages was created 01-01-2024")
+    rows = mock_tabulate.call_args.args[0]
+    assert rows[1] == [str(mailing_instance_one.id), "0", "2", "0", "0", "2"]
+    assert rows[-1] == ["Total", "0", "2", "0", "0", "2"]
+
+
+@pytest.mark.django_db
+@freeze_time("2024-01-02 12:30:00")
+def test_reconcile_mailings_stats(
+    mailing_instance_one, message_instance_one, message_instance_two
+):
+    Mailing.objects.filter(id=mailing_instance_one.id).update(
+        created_messages=10, scheduled_messages=10
+    )
+    reconcile_mailings_stats()
+    mailing_instance_one.refresh_from_db()
+    assert mailing_instance_one.created_messages == 2
+    assert mailing_instance_one.scheduled_messages == 1
+    assert mailing_instance_one.delivered_messages == 1
+
+
+@pytest.mark.django_db
+@freeze_time("2024-01-02 12:30:00")
+def test_reconcile_mailings_stats_skips_archived(
+    mailing_instance_one, message_instance_one
+):
+    Mailing.objects.filter(id=mailing_instance_one.id).update(
+        archived=True, created_messages=10
+    )
+    reconcile_mailings_stats()
+    mailing_instance_one.refresh_from_db()
+    assert mailing_instance_one.created_messages == 10
+
+
+@pytest.mark.django_db
+class TestFanoutMailing:
+    @freeze_time("2024-01-01 00:00:00")
+    @patch("api.tasks.TaskManager.create_mailing_message_celery_tasks")
+    def test_fanout_mailing(
+        self, mock_create_task, mailing_instance_one, client_instance_one
+    ):
+        mailing_instance_one.set_fanout_status(Mailing.FanoutStatus.PENDING)
+        fanout_mailing(mailing_instance_one.id)
+        mailing_instance_one.refresh_from_db()
+        assert mailing_instance_one.fanout_status == Mailing.FanoutStatus.DONE
+        assert mailing_instance_one.clients_count == 1
+        assert mailing_instance_one.created_messages == 1
+
+    @patch("api.handlers.message_handler.create_mailing_messages")
+    def test_fanout_mailing_failed(
+        self, mock_create_mailing_messages, mailing_instance_one
+    ):
+        mock_create_mailing_messages.side_effect = ValueError
+        mailing_instance_one.set_fanout_status(Mailing.FanoutStatus.PENDING)
+        with pytest.raises(ValueError):
+            fanout_mailing(mailing_instance_one.id)
+        mailing_instance_one.refresh_from_db()
+        assert (
+            mailing_instance_one.fanout_status == Mailing.FanoutStatus.FAILED
+        )
+
+    @patch("api.handlers.message_handler.create_mailing_messages")
+    def test_fanout_mailing_done(
+        self, mock_create_mailing_messages, mailing_instance_one
+    ):
+        fanout_mailing(mailing_instance_one.id)
+        mock_create_mailing_messages.assert_not_called()
 
 
 @pytest.mark.django_db
 class TestSendMailing:
-    @patch("api.tasks.send_mailing")
+    @patch("api.tasks.get_gateway_client")
     def test_send_mailing_success(
-        self, send_mailing_mock, message_instance_one
+        self, get_gateway_client_mock, message_instance_one
     ):
         assert message_instance_one.status == "SC"
-        send_mailing_mock.return_value.status_code = 200
+        get_gateway_client_mock.return_value.send.return_value.status_code = (
+            200
+        )
         send_mailing(message_instance_one.id)
         message_instance_one.refresh_from_db()
         assert message_instance_one.status == "DL"
 
+    @patch("api.tasks.get_gateway_client")
+    def test_send_mailing_cancelled(
+        self, get_gateway_client_mock, message_instance_four
+    ):
+        send_mailing(message_instance_four.id)
+        get_gateway_client_mock.return_value.send.assert_not_called()
+        message_instance_four.refresh_from_db()
+        assert message_instance_four.status == Message.Status.CANCELLED
+        assert message_instance_four.attempts == 0
+
+    @patch.dict("api.tasks.mailing_versions", clear=True)
+    @patch("api.tasks.get_gateway_client")
+    def test_send_mailing_outdated_version(
+        self, get_gateway_client_mock, message_instance_one
+    ):
+        message_instance_one.mailing.increment_version()
+        send_mailing(
+            message_instance_one.id,
+            mailing_id=message_instance_one.mailing_id,
+            mailing_version=0,
+        )
+        get_gateway_client_mock.return_value.send.assert_not_called()
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.status == Message.Status.SCHEDULED
+
+    @patch("api.tasks.get_gateway_client")
+    def test_send_mailing_rescheduled(
+        self, get_gateway_client_mock, message_instance_one
+    ):
+        message_instance_one.scheduled_at = dt(2024, 1, 2, 13, tzinfo=utc)
+        message_instance_one.save(update_fields=["scheduled_at"])
+        send_mailing(
+            message_instance_one.id,
+            scheduled_at=dt(2024, 1, 2, 12, tzinfo=utc).isoformat(),
+        )
+        get_gateway_client_mock.return_value.send.assert_not_called()
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.status == Message.Status.SCHEDULED
+
+    @freeze_time("2024-01-02 12:00:00")
+    @patch("api.tasks.send_mailing.apply_async")
+    @patch("api.tasks.get_gateway_client")
+    def test_send_mailing_retryable_error(
+        self, get_gateway_client_mock, apply_async_mock, message_instance_one
+    ):
+        get_gateway_client_mock.return_value.send.side_effect = HTTPError(
+            response=Mock(status_code=503)
+        )
+        apply_async_mock.return_value.id = "mock_celery_task_id"
+        send_mailing(message_instance_one.id)
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.status == Message.Status.SCHEDULED
+        assert message_instance_one.attempts == 1
+        assert message_instance_one.celery_task_id == "mock_celery_task_id"
+        assert Message.objects.count() == 1
+        eta = apply_async_mock.call_args.kwargs["eta"]
+        assert (
+            dt(2024, 1, 2, 12, 0, 5, tzinfo=pytz.UTC)
+            <= eta
+            <= dt(2024, 1, 2, 12, 0, 10, tzinfo=pytz.UTC)
+        )
+
+    @freeze_time("2024-01-02 12:00:00")
+    @patch("api.tasks.send_mailing.apply_async")
+    @patch("api.tasks.get_gateway_client")
+    def test_send_mailing_permanent_error(
+        self, get_gateway_client_mock, apply_async_mock, message_instance_one
+    ):
+        get_gateway_client_mock.return_value.send.side_effect = HTTPError(
+            response=Mock(status_code=400)
+        )
+        send_mailing(message_instance_one.id)
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.status == Message.Status.NOT_DELIVERED
+        apply_async_mock.assert_not_called()
+
+    @freeze_time("2024-01-02 12:00:00")
+    @patch("api.tasks.send_mailing.apply_async")
+    @patch("api.tasks.get_gateway_client")
+    def test_send_mailing_max_attempts(
+        self, get_gateway_client_mock, apply_async_mock, message_instance_one
+    ):
+        get_gateway_client_mock.return_value.send.side_effect = (
+            RequestsConnectionError()
+        )
+        Message.objects.filter(id=message_instance_one.id).update(
+            attempts=settings.API_RETRY_MAX_ATTEMPTS - 1
+        )
+        send_mailing(message_instance_one.id)
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.status == Message.Status.NOT_DELIVERED
+        apply_async_mock.assert_not_called()
+
+    @freeze_time("2024-01-02 12:59:59")
+    @patch("api.tasks.send_mailing.apply_async")
+    @patch("api.tasks.get_gateway_client")
+    def test_send_mailing_window_closed(
+        self, get_gateway_client_mock, apply_async_mock, message_instance_one
+    ):
+        get_gateway_client_mock.return_value.send.side_effect = (
+            RequestsConnectionError()
+        )
+        send_mailing(message_instance_one.id)
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.status == Message.Status.NOT_DELIVERED
+        apply_async_mock.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "error, exp",
+    [
+        (HTTPError(response=Mock(status_code=503)), True),
+        (HTTPError(response=Mock(status_code=429)), True),
+        (HTTPError(response=Mock(status_code=400)), False),
+        (RequestsConnectionError(), True),
+        (ValueError(), False),
+    ],
+)
+def test_is_retryable_error(error, exp):
+    assert is_retryable_error(error) is exp
+
+
+@pytest.mark.django_db
+@patch.dict("api.tasks.mailing_versions", clear=True)
+def test_is_mailing_version_outdated(mailing_instance_one):
+    mailing_id = mailing_instance_one.id
+    assert is_mailing_version_outdated(mailing_id, None) is False
+    with freeze_time("2024-01-01 00:00:00") as frozen_time:
+        assert is_mailing_version_outdated(mailing_id, 0) is False
+        mailing_instance_one.increment_version()
+        assert is_mailing_version_outdated(mailing_id, 0) is False
+        assert is_mailing_version_outdated(mailing_id, 1) is False
+        assert is_mailing_version_outdated(mailing_id, 0) is True
+        mailing_instance_one.increment_version()
+        frozen_time.tick(settings.MAILING_VERSION_CACHE_TTL + 1)
+        assert is_mailing_version_outdated(mailing_id, 1) is True
+    mailing_instance_one.delete()
+    assert is_mailing_version_outdated(mailing_id, 3) is True
+
+
+@pytest.mark.django_db
+@patch.dict("api.tasks.mailing_versions", clear=True)
+@override_settings(MAILING_VERSION_CACHE_SIZE=2)
+def test_is_mailing_version_outdated_cache_size(
+    mailing_instance_one, mailing_instance_two
+):
+    is_mailing_version_outdated(mailing_instance_one.id, 0)
+    is_mailing_version_outdated(mailing_instance_two.id, 0)
+    is_mailing_version_outdated(mailing_instance_one.id, 0)
+    is_mailing_version_outdated(0, 0)
+    assert list(mailing_versions) == [mailing_instance_one.id, 0]
+
+
+def test_get_retry_delay():
+    for attempt in range(1, 20):
+        delay = get_retry_delay(attempt)
+        backoff = min(
+            settings.API_RETRY_BACKOFF_MAX,
+            settings.API_RETRY_BACKOFF_BASE * 2 ** (attempt - 1),
+        )
+        assert backoff / 2 <= delay <= backoff
+
+
+@pytest.mark.django_db
+@patch("api.tasks.TaskManager.schedule_message_retry", return_value=False)
+@patch("api.tasks.get_gateway_client")
+def test_send_mailing_batch(
+    mock_get_gateway_client,
+    mock_schedule_message_retry,
+    mailing_instance_one,
+    message_instance_one,
+    message_instance_three,
+):
+    acquire_threads = []
+
+    def send(message_id, phone, text, rate_limited=True):
+        assert rate_limited is False
+        if message_id == message_instance_three.id:
+            raise HTTPError("Bad request")
+        return Mock(status_code=200)
+
+    gateway_client = mock_get_gateway_client.return_value
+    gateway_client.send.side_effect = send
+    gateway_client.rate_limiter.acquire.side_effect = (
+        lambda operator_code: acquire_threads.append(threading.get_ident())
+    )
+    Message.objects.filter(id=message_instance_three.id).update(
+        status=Message.Status.SCHEDULED
+    )
+    mailing_instance_one.update_messages_info()
+    send_mailing_batch([message_instance_one.id, message_instance_three.id])
+    assert gateway_client.send.call_count == 2
+    # Tokens are taken on the task thread, not on the pool threads
+    assert acquire_threads == [threading.get_ident()] * 2
+    message_instance_one.refresh_from_db()
+    message_instance_three.refresh_from_db()
+    assert message_instance_one.status == Message.Status.DELIVERED
+    assert message_instance_three.status == Message.Status.NOT_DELIVERED
+    mock_schedule_message_retry.assert_called_once_with(message_instance_three)
+    assert message_instance_one.attempts == 1
+    assert message_instance_three.attempts == 1
+    mailing_instance_one.refresh_from_db()
+    assert mailing_instance_one.scheduled_messages == 0
+    assert mailing_instance_one.delivered_messages == 1
+    assert mailing_instance_one.undelivered_messages == 1
+
 
 def test_get_mailings_stats():
     queryset = [
@@ -55,54 +369,237 @@ def test_get_mailings_stats():
 class TestTaskManager:
     @freeze_time("01-01-2024")
     @patch("api.tasks.send_mailing.apply_async")
-    @patch("api.models.Message.save")
-    def test_create_message_celery_task(
-        self, mock_save, mock_send_mailing_apply_async, message_instance_one
+    def test_create_mailing_message_celery_tasks(
+        self,
+        mock_send_mailing_apply_async,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_three,
     ):
-        mock_send_mailing_apply_async.return_value.id = "mock_celery_task_id"
-        TaskManager.create_message_celery_task(message_instance_one)
-        mock_send_mailing_apply_async.assert_called_once_with(
+        Message.objects.update(status=Message.Status.SCHEDULED)
+        send_time = dt(2024, 1, 2, 12, 0, 0, tzinfo=pytz.UTC)
+        with patch(
+            "api.tasks.Mailing.update_dispatched_messages"
+        ) as mock_update_dispatched_messages:
+            TaskManager.create_mailing_message_celery_tasks(
+                mailing_instance_one
+            )
+        mock_update_dispatched_messages.assert_called_once_with(
+            mailing_instance_one.id, 2
+        )
+        message_instance_one.refresh_from_db()
+        mock_send_mailing_apply_async.assert_any_call(
             args=[message_instance_one.id],
-            eta=dt(2024, 1, 2, 12, 0, 0, tzinfo=pytz.UTC),
+            kwargs={
+                "mailing_id": message_instance_one.mailing_id,
+                "mailing_version": 0,
+                "scheduled_at": send_time.isoformat(),
+            },
+            eta=send_time,
+            task_id=message_instance_one.celery_task_id,
         )
-        assert message_instance_one.celery_task_id == "mock_celery_task_id"
-        mock_save.assert_called_once()
+        assert mock_send_mailing_apply_async.call_count == 2
+        assert message_instance_one.celery_task_id
+        assert message_instance_one.scheduled_at == send_time
 
-    @patch("api.tasks.current_app.control.revoke")
-    @patch("api.models.Message.save")
-    @patch("api.tasks.current_app.AsyncResult")
-    def test_delete_message_celery_task(
-        self, mock_async_result, mock_save, mock_revoke, message_instance_one
+    @freeze_time("01-01-2024")
+    @patch("api.tasks.send_mailing.apply_async")
+    def test_reschedule_mailing_messages(
+        self,
+        mock_apply_async,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
     ):
-        message_instance_one.celery_task_id = "mock_celery_task_id"
-        TaskManager.delete_message_celery_task(message_instance_one)
-        mock_async_result.assert_called_once_with("mock_celery_task_id")
-        mock_revoke.assert_called_once_with(
-            "mock_celery_task_id", terminate=True
+        TaskManager.create_mailing_message_celery_tasks(mailing_instance_one)
+        mock_apply_async.reset_mock()
+        assert (
+            TaskManager.reschedule_mailing_messages(mailing_instance_one) == 0
         )
-        assert message_instance_one.status == Message.Status.CANCELLED
-        mock_save.assert_called_once()
+        mock_apply_async.assert_not_called()
 
-    @patch("api.tasks.TaskManager.delete_message_celery_task")
-    @patch("api.tasks.TaskManager.create_new_message_and_send")
-    def test_update_message_celery_task(
-        self, mock_create_new_task, mock_delete_task, message_instance_one
+        send_time = dt(2024, 1, 2, 12, 30, 0, tzinfo=pytz.UTC)
+        mailing_instance_one.datetime_start = send_time
+        assert (
+            TaskManager.reschedule_mailing_messages(mailing_instance_one) == 1
+        )
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.scheduled_at == send_time
+        mock_apply_async.assert_called_once_with(
+            args=[message_instance_one.id],
+            kwargs={
+                "mailing_id": mailing_instance_one.id,
+                "mailing_version": 0,
+                "scheduled_at": send_time.isoformat(),
+            },
+            eta=send_time,
+            task_id=message_instance_one.celery_task_id,
+        )
+        assert Message.objects.count() == 2
+
+    @freeze_time("01-01-2024")
+    def test_reschedule_mailing_messages_window_closed(
+        self, mailing_instance_one, message_instance_one
     ):
-        TaskManager.update_message_celery_task(message_instance_one)
-        mock_delete_task.assert_called_once_with(message_instance_one)
-        mock_create_new_task.assert_called_once_with(message_instance_one)
+        mailing_instance_one.update_messages_info()
+        mailing_instance_one.send_interval_time_start = time(14, 0)
+        mailing_instance_one.send_interval_time_end = time(15, 0)
+        assert (
+            TaskManager.reschedule_mailing_messages(mailing_instance_one) == 0
+        )
+        message_instance_one.refresh_from_db()
+        assert message_instance_one.status == Message.Status.CANCELLED
+        mailing_instance_one.refresh_from_db()
+        assert mailing_instance_one.cancelled_messages == 1
 
-    @freeze_time("2024-01-02 12:00:00", tz_offset=0)
-    @patch("api.tasks.send_mailing.apply_async")
-    def test_create_new_message_and_send(
-        self, mock_apply_async, message_instance_one
-    ):
-        mock_apply_async.return_value.id = "mock_celery_task_id"
-        TaskManager.create_new_message_and_send(message_instance_one)
-        new_message = Message.objects.get(id=2)
-        assert new_message.client == message_instance_one.client
-        assert new_message.mailing == message_instance_one.mailing
-        mock_apply_async.assert_called_once_with(
-            args=[2],
-            eta=dt(2024, 1, 2, 12, 0, 0, tzinfo=pytz.UTC),
+    @freeze_time("01-01-2024")
+    @patch("api.tasks.send_mailing_batch.apply_async")
+    def test_create_mailing_batch_celery_tasks(
+        self,
+        mock_apply_async,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
+        message_instance_three,
+    ):
+        messages = [
+            message_instance_one,
+            message_instance_two,
+            message_instance_three,
+        ]
+        Message.objects.update(status=Message.Status.SCHEDULED)
+        TaskManager.create_mailing_batch_celery_tasks(
+            mailing_instance_one, batch_size=2
         )
+        assert mock_apply_async.call_count == 2
+        batches = [
+            call.kwargs["args"][0] for call in mock_apply_async.call_args_list
+        ]
+        assert sorted(sum(batches, [])) == sorted(m.id for m in messages)
+        for call in mock_apply_async.call_args_list:
+            assert call.kwargs["eta"] == dt(2024, 1, 2, 12, 0, tzinfo=pytz.UTC)
+            assert Message.objects.filter(
+                id__in=call.kwargs["args"][0],
+                celery_task_id=call.kwargs["task_id"],
+                scheduled_at=call.kwargs["eta"],
+            ).count() == len(call.kwargs["args"][0])
+
+    @freeze_time("01-01-2024")
+    def test_create_mailing_schedules(
+        self,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
+        message_instance_three,
+    ):
+        TaskManager.create_mailing_schedules(mailing_instance_one)
+        schedule = MailingSchedule.objects.get(mailing=mailing_instance_one)
+        assert schedule.time_zone == pytz.UTC
+        assert schedule.send_time == dt(2024, 1, 2, 12, 0, tzinfo=pytz.UTC)
+        assert schedule.is_released is False
+
+
+@pytest.mark.django_db
+def test_cancel_mailing_messages(
+    mailing_instance_one,
+    message_instance_one,
+    message_instance_two,
+    message_instance_three,
+):
+    Message.objects.filter(id=message_instance_three.id).update(
+        status=Message.Status.SCHEDULED
+    )
+    mailing_instance_one.update_messages_info()
+    cancelled_messages = TaskManager.cancel_mailing_messages(
+        mailing_instance_one
+    )
+    assert cancelled_messages == 2
+    assert mailing_instance_one.version == 1
+    mailing_instance_one.refresh_from_db()
+    assert mailing_instance_one.scheduled_messages == 0
+    assert mailing_instance_one.cancelled_messages == 2
+    assert mailing_instance_one.delivered_messages == 1
+
+
+@pytest.mark.django_db
+@patch("api.tasks.send_mailing_batch.apply_async")
+def test_release_mailing_schedules(
+    mock_apply_async,
+    mailing_instance_one,
+    message_instance_one,
+    message_instance_two,
+):
+    with freeze_time("2024-01-01 00:00:00"):
+        TaskManager.create_mailing_schedules(mailing_instance_one)
+        release_mailing_schedules()
+        mock_apply_async.assert_not_called()
+    with freeze_time("2024-01-02 12:00:00"):
+        release_mailing_schedules()
+        release_mailing_schedules()
+    mock_apply_async.assert_called_once_with(
+        args=[[message_instance_one.id]],
+        kwargs={
+            "mailing_id": mailing_instance_one.id,
+            "mailing_version": 0,
+            "scheduled_at": None,
+        },
+        task_id=ANY,
+    )
+    message_instance_one.refresh_from_db()
+    assert (
+        message_instance_one.celery_task_id
+        == mock_apply_async.call_args.kwargs["task_id"]
+    )
+    assert MailingSchedule.objects.get().is_released is True
+    mailing_instance_one.refresh_from_db()
+    assert mailing_instance_one.dispatched_messages == 1
+
+
+@pytest.mark.django_db
+@patch("api.tasks.send_mailing_batch.apply_async")
+def test_release_mailing_schedules_time_zone_changed(
+    mock_apply_async, mailing_instance_one, message_instance_one
+):
+    with freeze_time("2024-01-01 00:00:00"):
+        TaskManager.create_mailing_schedules(mailing_instance_one)
+    Client.objects.filter(id=message_instance_one.client_id).update(
+        time_zone="Europe/Moscow"
+    )
+    with freeze_time("2024-01-02 12:00:00"):
+        release_mailing_schedules()
+    assert mock_apply_async.call_args.kwargs["args"] == [
+        [message_instance_one.id]
+    ]
+
+
+@pytest.mark.django_db
+@patch("api.tasks.send_mailing_batch.apply_async")
+def test_release_mailing_schedules_retried(
+    mock_apply_async,
+    mailing_instance_one,
+    message_instance_one,
+    client_instance_two,
+):
+    message = Message.objects.create(
+        mailing=mailing_instance_one, client=client_instance_two
+    )
+    with freeze_time("2024-01-01 00:00:00"):
+        TaskManager.create_mailing_schedules(mailing_instance_one)
+    mock_apply_async.side_effect = [None, ConnectionError("Broker is down")]
+    with freeze_time("2024-01-02 12:00:00"), override_settings(
+        MESSAGES_BATCH_SIZE=1
+    ):
+        release_mailing_schedules()
+    schedule = MailingSchedule.objects.get()
+    assert schedule.is_released is False
+    message.refresh_from_db()
+    assert message.celery_task_id is None
+
+    mock_apply_async.side_effect = None
+    with freeze_time("2024-01-02 12:01:00"):
+        release_mailing_schedules()
+    schedule.refresh_from_db()
+    assert schedule.is_released is True
+    assert mock_apply_async.call_args.kwargs["args"] == [[message.id]]
+    mailing_instance_one.refresh_from_db()
+    assert mailing_instance_one.dispatched_messages == 2
@@ -1,10 +1,23 @@
 from datetime import datetime as dt
+from io import StringIO
+from unittest.mock import patch
 
 import pytest
 import pytz
+from django.core.management import call_command
+from django.test import override_settings
 from freezegun import freeze_time
 
-from api.utils import get_message_send_time
+from api.models import ArchivedMessage, Mailing, Message, MessageDailyStats
+from api.tasks import send_mailing
+from api.utils import (
+    archive_ended_mailings,
+    archive_mailing_messages,
+    create_mailing_messages,
+    get_message_send_time,
+    refresh_message_daily_stats,
+    update_messages_status,
+)
 
 
 @freeze_time("2024-01-01 00:00:00")
@@ -975,3 +988,265 @@ class TestMailingDateTimeStartInPast:
         client_instance_one.time_zone = pytz.timezone("Asia/Yekaterinburg")
         res = get_message_send_time(mailing_instance_one, client_instance_one)
         assert res is None, res
+
+
+@freeze_time("2024-01-01 00:00:00")
+@pytest.mark.django_db
+class TestCreateMailingMessages:
+    def test_create_mailing_messages_in_chunks(
+        self,
+        mailing_instance_one,
+        client_instance_one,
+        client_instance_two,
+        client_instance_three,
+    ):
+        created_messages = create_mailing_messages(
+            mailing_instance_one, chunk_size=1
+        )
+        assert created_messages == 2
+        messages = Message.objects.filter(mailing=mailing_instance_one)
+        assert {message.client for message in messages} == {
+            client_instance_one,
+            client_instance_two,
+        }
+        mailing_instance_one.refresh_from_db()
+        assert mailing_instance_one.clients_count == 2
+        assert mailing_instance_one.created_messages == 2
+        assert mailing_instance_one.scheduled_messages == 2
+
+    def test_create_mailing_messages_resumes(
+        self,
+        mailing_instance_one,
+        client_instance_one,
+        client_instance_two,
+    ):
+        update_messages_counters = Mailing.update_messages_counters
+
+        def fail_second_chunk(*args, **kwargs):
+            if (
+                Message.objects.filter(mailing=mailing_instance_one).count()
+                > 1
+            ):
+                raise ValueError
+            update_messages_counters(*args, **kwargs)
+
+        with patch(
+            "api.utils.Mailing.update_messages_counters",
+            side_effect=fail_second_chunk,
+        ):
+            with pytest.raises(ValueError):
+                create_mailing_messages(mailing_instance_one, chunk_size=1)
+        # The first chunk is committed with its counters
+        mailing_instance_one.refresh_from_db()
+        assert mailing_instance_one.clients_count == 2
+        assert mailing_instance_one.created_messages == 1
+        assert (
+            Message.objects.filter(mailing=mailing_instance_one).count() == 1
+        )
+
+        assert create_mailing_messages(mailing_instance_one, chunk_size=1) == 1
+        mailing_instance_one.refresh_from_db()
+        assert mailing_instance_one.created_messages == 2
+        assert {
+            message.client
+            for message in Message.objects.filter(mailing=mailing_instance_one)
+        } == {client_instance_one, client_instance_two}
+
+    def test_create_mailing_messages_skips_closed_window(
+        self, mailing_instance_one, client_instance_one
+    ):
+        mailing_instance_one.send_interval_time_start = dt.time(
+            dt(2022, 1, 1, 21, 00)
+        )
+        mailing_instance_one.send_interval_time_end = dt.time(
+            dt(2022, 1, 1, 22, 00)
+        )
+        created_messages = create_mailing_messages(mailing_instance_one)
+        assert created_messages == 0
+        assert mailing_instance_one.clients_count == 0
+
+    def test_create_mailing_messages_by_time_zone(
+        self,
+        mailing_instance_one,
+        client_instance_one,
+        client_instance_two,
+    ):
+        mailing_instance_one.send_interval_time_start = dt.time(
+            dt(2022, 1, 1, 21, 00)
+        )
+        mailing_instance_one.send_interval_time_end = dt.time(
+            dt(2022, 1, 1, 22, 00)
+        )
+        client_instance_two.time_zone = pytz.timezone("Asia/Vladivostok")
+        client_instance_two.save()
+        created_messages = create_mailing_messages(mailing_instance_one)
+        assert created_messages == 1
+        assert mailing_instance_one.clients_count == 1
+        message = Message.objects.get(mailing=mailing_instance_one)
+        assert message.client == client_instance_two
+
+
+@pytest.mark.django_db
+class TestRefreshMessageDailyStats:
+    def test_refresh_message_daily_stats(
+        self,
+        mailing_instance_one,
+        client_instance_one,
+        client_instance_two,
+    ):
+        with freeze_time("2024-01-01 10:00:00"):
+            message = Message.objects.create(
+                mailing=mailing_instance_one, client=client_instance_one
+            )
+            Message.objects.create(
+                mailing=mailing_instance_one, client=client_instance_two
+            )
+        with freeze_time("2024-01-02 10:00:00"):
+            Message.objects.create(
+                mailing=mailing_instance_one, client=client_instance_two
+            )
+        with freeze_time("2024-01-02 10:30:00"):
+            assert [str(day) for day in refresh_message_daily_stats()] == [
+                "2024-01-01",
+                "2024-01-02",
+            ]
+        assert list(
+            MessageDailyStats.objects.values_list(
+                "date", "status", "operator_code", "count"
+            )
+        ) == [
+            (dt(2024, 1, 2).date(), "SC", "999", 1),
+            (dt(2024, 1, 1).date(), "SC", "123", 1),
+            (dt(2024, 1, 1).date(), "SC", "999", 1),
+        ]
+
+        with freeze_time("2024-01-02 10:45:00"):
+            assert refresh_message_daily_stats() == []
+            update_messages_status([message], Message.Status.DELIVERED)
+        with freeze_time("2024-01-02 11:00:00"):
+            assert [str(day) for day in refresh_message_daily_stats()] == [
+                "2024-01-01"
+            ]
+        assert MessageDailyStats.objects.get(
+            date=dt(2024, 1, 1).date(), operator_code="123"
+        ).status == (Message.Status.DELIVERED)
+
+    @patch("api.tasks.get_gateway_client")
+    def test_refresh_message_daily_stats_after_send(
+        self,
+        get_gateway_client_mock,
+        mailing_instance_one,
+        client_instance_one,
+    ):
+        with freeze_time("2024-01-01 09:00:00"):
+            message = Message.objects.create(
+                mailing=mailing_instance_one, client=client_instance_one
+            )
+        with freeze_time("2024-01-01 10:00:00"):
+            refresh_message_daily_stats()
+        with freeze_time("2024-01-01 10:30:00"):
+            send_mailing(message.id)
+        with freeze_time("2024-01-01 11:00:00"):
+            assert [str(day) for day in refresh_message_daily_stats()] == [
+                "2024-01-01"
+            ]
+        assert list(
+            MessageDailyStats.objects.values_list("status", "count")
+        ) == [(Message.Status.DELIVERED, 1)]
+
+    def test_refresh_message_daily_stats_overlap(
+        self, mailing_instance_one, client_instance_one
+    ):
+        with freeze_time("2024-01-01 09:00:00"):
+            Message.objects.create(
+                mailing=mailing_instance_one, client=client_instance_one
+            )
+        with freeze_time("2024-01-01 10:00:00"):
+            refresh_message_daily_stats()
+        # Stamped before the previous refresh, committed after it
+        with freeze_time("2024-01-01 09:55:00"):
+            Message.objects.create(
+                mailing=mailing_instance_one, client=client_instance_one
+            )
+        with freeze_time("2024-01-01 10:15:00"):
+            assert [str(day) for day in refresh_message_daily_stats()] == [
+                "2024-01-01"
+            ]
+        assert MessageDailyStats.objects.get().count == 2
+        with override_settings(MESSAGE_DAILY_STATS_REFRESH_OVERLAP=0):
+            with freeze_time("2024-01-01 10:30:00"):
+                assert refresh_message_daily_stats() == []
+
+
+@pytest.mark.django_db
+class TestArchiveMessages:
+    def test_archive_mailing_messages(
+        self,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
+    ):
+        assert archive_mailing_messages(mailing_instance_one, 1) == 2
+        mailing_instance_one.refresh_from_db()
+        assert mailing_instance_one.archived
+        assert mailing_instance_one.created_messages == 2
+        assert mailing_instance_one.delivered_messages == 1
+        assert not Message.objects.exists()
+        archived = ArchivedMessage.objects.get(id=message_instance_two.id)
+        assert archived.status == Message.Status.DELIVERED
+        assert archived.client_id == message_instance_two.client_id
+        assert archived.created_at == message_instance_two.created_at
+
+    def test_archive_ended_mailings(
+        self,
+        mailing_instance_one,
+        mailing_instance_two,
+        message_instance_one,
+        client_instance_one,
+    ):
+        mailing_instance_two.datetime_end = dt(2024, 1, 30, tzinfo=pytz.UTC)
+        mailing_instance_two.save()
+        message = Message.objects.create(
+            mailing=mailing_instance_two, client=client_instance_one
+        )
+        with freeze_time("2024-02-01 00:00:00"):
+            assert archive_ended_mailings(days=7) == {
+                mailing_instance_one.id: 1
+            }
+        assert list(Message.objects.all()) == [message]
+        assert MessageDailyStats.objects.filter(
+            mailing=mailing_instance_one
+        ).exists()
+
+    def test_archived_mailing_daily_stats_kept(
+        self, mailing_instance_one, mailing_instance_two, client_instance_one
+    ):
+        with freeze_time("2024-01-01 10:00:00"):
+            Message.objects.create(
+                mailing=mailing_instance_one, client=client_instance_one
+            )
+            message = Message.objects.create(
+                mailing=mailing_instance_two, client=client_instance_one
+            )
+            refresh_message_daily_stats()
+            archive_mailing_messages(mailing_instance_one)
+        with freeze_time("2024-01-01 11:00:00"):
+            update_messages_status([message], Message.Status.DELIVERED)
+            refresh_message_daily_stats()
+        assert set(
+            MessageDailyStats.objects.values_list("mailing_id", "status")
+        ) == {
+            (mailing_instance_one.id, Message.Status.SCHEDULED),
+            (mailing_instance_two.id, Message.Status.DELIVERED),
+        }
+
+    def test_archive_messages_command(
+        self, mailing_instance_one, message_instance_one
+    ):
+        out = StringIO()
+        with freeze_time("2024-01-10 00:00:00"):
+            call_command("archive_messages", "--days", "7", stdout=out)
+        assert "1 messages of 1 mailings archived" in out.getvalue()
+        assert ArchivedMessage.objects.filter(
+            id=message_instance_one.id
+        ).exists()
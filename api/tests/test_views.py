@@ -1,17 +1,21 @@
+import gzip
 import json
 from datetime import datetime as dt
 from datetime import timedelta
 from unittest.mock import patch
 
 import pytest
+import pytz
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from freezegun import freeze_time
 from rest_framework import serializers, status
 from rest_framework.test import APIClient
 
-from api.models import Mailing
-from api.views import MailingViewSet
+from api.models import Client, Mailing, Message, MessageDailyStats
+from api.utils import archive_mailing_messages
+from api.views import MailingViewSet, filter_by_created_at
 
 api_client = APIClient()
 
@@ -38,7 +42,7 @@ class TestMailingViewSet:
         mailing_instance_one.save()
         MailingViewSet().validate_mailing_editability(mailing_instance_one)
 
-    @patch("api.tasks.TaskManager.create_message_celery_task")
+    @patch("api.tasks.TaskManager.create_mailing_message_celery_tasks")
     def test_create_mailing(self, mock_create, api_client):
         mailing_data = {
             "datetime_start": timezone.now() - timedelta(days=1),
@@ -53,8 +57,59 @@ class TestMailingViewSet:
         mailing_id = response.data["id"]
         assert Mailing.objects.filter(id=mailing_id).exists()
 
+    @override_settings(MAILING_FANOUT_ASYNC=True)
+    @patch("api.views.fanout_mailing.delay")
+    @patch("api.views.message_handler.create_messages")
+    def test_create_mailing_async(
+        self,
+        mock_create_messages,
+        mock_fanout_delay,
+        api_client,
+        django_capture_on_commit_callbacks,
+    ):
+        mailing_data = {
+            "datetime_start": timezone.now() - timedelta(days=1),
+            "datetime_end": timezone.now() + timedelta(days=1),
+            "text": "Test Mailing",
+        }
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(
+                reverse("api:mailing-list"), mailing_data
+            )
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["fanout_status"] == Mailing.FanoutStatus.PENDING
+        mock_create_messages.assert_not_called()
+        mock_fanout_delay.assert_called_once_with(response.data["id"])
+
+    def test_mailing_progress(self, api_client, mailing_instance_one):
+        response = api_client.get(
+            reverse("api:mailing-progress", args=[mailing_instance_one.id]),
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            "id": mailing_instance_one.id,
+            "fanout_status": Mailing.FanoutStatus.DONE,
+            "clients_count": 0,
+            "created_messages": 0,
+            "dispatched_messages": 0,
+        }
+
+    @patch("api.tasks.TaskManager.create_mailing_message_celery_tasks")
+    def test_create_mailing_invalid_client_filter(
+        self, mock_create, api_client
+    ):
+        mailing_data = {
+            "datetime_start": timezone.now() - timedelta(days=1),
+            "datetime_end": timezone.now() + timedelta(days=1),
+            "text": "Test Mailing",
+            "client_filter": "tz:Mars/Base",
+        }
+        response = api_client.post(reverse("api:mailing-list"), mailing_data)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "client_filter" in response.data
+
     @freeze_time("01-01-2024")
-    @patch("api.tasks.TaskManager.update_message_celery_task")
+    @patch("api.tasks.TaskManager.reschedule_mailing_messages")
     def test_update_mailing(
         self, mock_update, api_client, mailing_instance_one
     ):
@@ -69,7 +124,7 @@ class TestMailingViewSet:
         assert response.data["text"] == update_data["text"]
 
     @freeze_time("01-01-2024")
-    @patch("api.tasks.TaskManager.delete_message_celery_task")
+    @patch("api.tasks.TaskManager.cancel_mailing_messages")
     def test_destroy_mailing(
         self, mock_delete, api_client, mailing_instance_one
     ):
@@ -89,7 +144,79 @@ class TestMailingViewSet:
             reverse("api:mailing-detail", args=[mailing_instance_one.id]),
         )
         assert response.status_code == status.HTTP_200_OK
-        assert len(json.loads(response.content)["mailing_messages"]) == 2
+        assert "mailing_messages" not in response.data
+        assert response.data["id"] == mailing_instance_one.id
+
+    def test_mailing_messages(
+        self,
+        api_client,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
+    ):
+        url = reverse("api:mailing-messages", args=[mailing_instance_one.id])
+        response = api_client.get(url, {"page_size": 1})
+        assert response.status_code == status.HTTP_200_OK
+        assert [m["id"] for m in response.data["results"]] == [
+            message_instance_one.id
+        ]
+        response = api_client.get(response.data["next"])
+        assert [m["id"] for m in response.data["results"]] == [
+            message_instance_two.id
+        ]
+        assert response.data["next"] is None
+
+    def test_mailing_messages_archived(
+        self,
+        api_client,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
+    ):
+        archive_mailing_messages(mailing_instance_one)
+        url = reverse("api:mailing-messages", args=[mailing_instance_one.id])
+        response = api_client.get(url, {"status": "DL"})
+        assert response.status_code == status.HTTP_200_OK
+        assert [m["id"] for m in response.data["results"]] == [
+            message_instance_two.id
+        ]
+
+    def test_mailing_messages_status(
+        self,
+        api_client,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
+    ):
+        url = reverse("api:mailing-messages", args=[mailing_instance_one.id])
+        response = api_client.get(url, {"status": "DL,ND"})
+        assert [m["id"] for m in response.data["results"]] == [
+            message_instance_two.id
+        ]
+        response = api_client.get(url, {"status": "XX"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_mailing_messages_stream(
+        self,
+        api_client,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
+    ):
+        url = reverse("api:mailing-messages", args=[mailing_instance_one.id])
+        response = api_client.get(url, {"stream": "true"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        assert [row["id"] for row in rows] == [
+            message_instance_one.id,
+            message_instance_two.id,
+        ]
+        assert rows[0]["status"] == "SC"
+        assert rows[0]["client"] == message_instance_one.client_id
 
 
 @pytest.mark.django_db
@@ -114,3 +241,179 @@ class TestClientViewSet:
         assert json.loads(response.content) == {
             "phone": "Phone number must be unique."
         }
+
+    def test_bulk_import_clients(self, api_client, client_instance_one):
+        response = api_client.post(
+            reverse("api:client-bulk-import"),
+            "phone,tag\n71234567890,New\n79991234567,\n123,\n",
+            content_type="text/csv",
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["imported"] == 2
+        assert response.data["errors"][0]["line"] == 4
+        assert Client.objects.get(phone="71234567890").tag == "New"
+        assert Client.objects.get(phone="79991234567").operator_code == "999"
+
+    def test_bulk_import_clients_unsupported(self, api_client):
+        response = api_client.post(
+            reverse("api:client-bulk-import"),
+            {"phone": "79991234567"},
+        )
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    def test_export_clients(
+        self, api_client, client_instance_one, client_instance_two
+    ):
+        response = api_client.get(
+            reverse("api:client-export"), {"compress": "gzip"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/gzip"
+        assert "clients.csv.gz" in response["Content-Disposition"]
+        lines = gzip.decompress(b"".join(response.streaming_content))
+        lines = lines.decode().splitlines()
+        assert lines[0] == (
+            "id,phone,operator_code,tag,time_zone,created_at,updated_at"
+        )
+        assert len(lines) == 3
+
+    def test_export_clients_invalid_format(self, api_client):
+        response = api_client.get(
+            reverse("api:client-export"), {"file_format": "xml"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestMessageViewSet:
+    def test_export_messages(
+        self,
+        api_client,
+        mailing_instance_one,
+        message_instance_one,
+        message_instance_two,
+    ):
+        response = api_client.get(
+            reverse("api:message-export"),
+            {
+                "file_format": "ndjson",
+                "mailing": mailing_instance_one.id,
+                "status": "DL",
+                "date_from": "2000-01-01",
+            },
+        )
+        assert response.status_code == status.HTTP_200_OK
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        assert [row["id"] for row in rows] == [message_instance_two.id]
+
+    def test_export_messages_archived(
+        self,
+        api_client,
+        mailing_instance_one,
+        client_instance_one,
+        message_instance_one,
+        message_instance_two,
+    ):
+        archive_mailing_messages(mailing_instance_one)
+        message = Message.objects.create(client=client_instance_one)
+        response = api_client.get(
+            reverse("api:message-export"), {"file_format": "ndjson"}
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        assert [row["id"] for row in rows] == [
+            message_instance_one.id,
+            message_instance_two.id,
+            message.id,
+        ]
+        response = api_client.get(
+            reverse("api:message-export"),
+            {
+                "file_format": "ndjson",
+                "mailing": mailing_instance_one.id,
+                "status": "DL",
+            },
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        assert [row["id"] for row in rows] == [message_instance_two.id]
+
+    @pytest.mark.parametrize(
+        "params",
+        [{"date_to": "yesterday"}, {"mailing": "x"}, {"status": "XX"}],
+    )
+    def test_export_messages_invalid(self, api_client, params):
+        response = api_client.get(reverse("api:message-export"), params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestMessageDailyStatsViewSet:
+    def test_list_message_stats(
+        self, api_client, mailing_instance_one, mailing_instance_two
+    ):
+        for mailing, status_ in (
+            (mailing_instance_one, "DL"),
+            (mailing_instance_two, "DL"),
+            (mailing_instance_one, "ND"),
+        ):
+            MessageDailyStats.objects.create(
+                date=dt(2024, 1, 1).date(),
+                mailing=mailing,
+                status=status_,
+                operator_code="999",
+                count=5,
+                refreshed_at=timezone.now(),
+            )
+        response = api_client.get(
+            reverse("api:messagedailystats-list"),
+            {
+                "date_from": "2024-01-01",
+                "mailing": mailing_instance_one.id,
+                "status": "DL",
+            },
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"] == [
+            {
+                "date": "2024-01-01",
+                "mailing": mailing_instance_one.id,
+                "status": "DL",
+                "operator_code": "999",
+                "count": 5,
+            }
+        ]
+
+    def test_list_message_stats_invalid_filter(self, api_client):
+        response = api_client.get(
+            reverse("api:messagedailystats-list"), {"date_to": "yesterday"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_filter_by_created_at(client_instance_one, client_instance_two):
+    Client.objects.filter(id=client_instance_one.id).update(
+        created_at=dt(2024, 1, 1, 23, 30, tzinfo=pytz.UTC)
+    )
+    Client.objects.filter(id=client_instance_two.id).update(
+        created_at=dt(2024, 1, 2, tzinfo=pytz.UTC)
+    )
+    clients = filter_by_created_at(
+        Client.objects.all(), "2024-01-01", "2024-01-01"
+    )
+    assert list(clients) == [client_instance_one]
+    # The column is compared as is, without casting it to a date
+    sql = str(clients.query)
+    assert "cast_date" not in sql and "::date" not in sql
+    clients = filter_by_created_at(
+        Client.objects.all(), "2024-01-01T23:45:00", "2024-01-02T00:00:00"
+    )
+    assert list(clients) == [client_instance_two]
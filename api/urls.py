@@ -1,7 +1,12 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import ClientViewSet, MailingViewSet
+from .views import (
+    ClientViewSet,
+    MailingViewSet,
+    MessageDailyStatsViewSet,
+    MessageViewSet,
+)
 
 app_name = "api"
 
@@ -9,6 +14,8 @@ router_v1 = DefaultRouter()
 
 router_v1.register("clients", ClientViewSet)
 router_v1.register("mailings", MailingViewSet)
+router_v1.register("messages", MessageViewSet)
+router_v1.register("message-stats", MessageDailyStatsViewSet)
 
 urlpatterns = [
     path("v1/", include(router_v1.urls)),
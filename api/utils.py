@@ -1,8 +1,15 @@
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import datetime, time, timedelta
+from itertools import islice
 
 import pytz
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 
-from api.models import Message
+from api.models import ArchivedMessage, Mailing, Message, MessageDailyStats
 
 
 def get_message_send_time(mailing, client, interval=0):
@@ -17,27 +24,37 @@ def get_message_send_time(mailing, client, interval=0):
     Returns:
         datetime: The time to send the message in UTC time zone.
     """
+    return get_time_zone_send_time(mailing, client.time_zone, interval)
 
+
+def get_time_zone_send_time(mailing, time_zone, interval=0):
+    """
+    Calculate the time to send a message to a client in the given time zone.
+
+    Args:
+        mailing (Mailing): The mailing object containing start and end datetime and interval times.
+        time_zone (tzinfo): The client's time zone.
+        interval (int, optional): The time (in sec) after which the message should be sent. Defaults to 0.
+
+    Returns:
+        datetime: The time to send the message in UTC time zone.
+    """
     start = max(
-        mailing.datetime_start.astimezone(client.time_zone),
-        (datetime.now() + timedelta(seconds=interval)).astimezone(
-            client.time_zone
-        ),
+        mailing.datetime_start.astimezone(time_zone),
+        (datetime.now() + timedelta(seconds=interval)).astimezone(time_zone),
     )
-    end = mailing.datetime_end.astimezone(client.time_zone)
+    end = mailing.datetime_end.astimezone(time_zone)
 
     if not mailing.send_interval_time_start:
         return start.astimezone(pytz.utc)
 
-    start_interval = mailing.send_interval_time_start.strftime("%H:%M")
-    end_interval = mailing.send_interval_time_end.strftime("%H:%M")
+    start_interval = mailing.send_interval_time_start
+    end_interval = mailing.send_interval_time_end
 
     start_loc = start.replace(
-        hour=int(start_interval[:2]), minute=int(start_interval[3:])
-    )
-    end_loc = start.replace(
-        hour=int(end_interval[:2]), minute=int(end_interval[3:])
+        hour=start_interval.hour, minute=start_interval.minute
     )
+    end_loc = start.replace(hour=end_interval.hour, minute=end_interval.minute)
 
     if start_loc < end_loc:
         if start < start_loc:
@@ -60,26 +77,302 @@ def get_message_send_time(mailing, client, interval=0):
         return start.astimezone(pytz.utc)
 
 
-def get_mailing_messages(mailing, created=False):
+def get_time_zones_send_times(mailing, time_zones, interval=0):
     """
-    Returns messages' list of current mailing.
+    Calculate the time to send a message for each of the given time zones.
 
     Args:
         mailing (Mailing): The mailing object containing start and end datetime and interval times.
-        created (bool, optional): Indicates whether the mailing is new. Defaults to False.
+        time_zones (Iterable): The clients' time zones.
+        interval (int, optional): The time (in sec) after which the message should be sent. Defaults to 0.
 
     Returns:
-        list: Messages' list of current mailing
+        dict: The time to send the message in UTC time zone by time zone.
     """
-    if created:
-        clients = [
-            client
-            for client in mailing.get_mailing_clients()
-            if get_message_send_time(mailing, client)
+    return {
+        time_zone: get_time_zone_send_time(mailing, time_zone, interval)
+        for time_zone in set(time_zones)
+    }
+
+
+def chunked(iterable, size):
+    """
+    Split an iterable into lists of the given size.
+
+    Args:
+        iterable (Iterable): The iterable to split.
+        size (int): The maximum length of each chunk.
+
+    Yields:
+        list: The next chunk of the iterable.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def update_messages_status(messages, status):
+    """
+    Set the status of the messages with a single UPDATE query.
+
+    The mailing counters are adjusted once per mailing and previous status.
+
+    Args:
+        messages (list): The message objects to update.
+        status (str): The new status of the messages.
+    """
+    if not messages:
+        return
+    now = timezone.now()
+    Message.objects.filter(id__in=[message.id for message in messages]).update(
+        status=status, datetime_send=now, updated_at=now
+    )
+    transitions = Counter(
+        (message.mailing_id, message._loaded_status) for message in messages
+    )
+    for (mailing_id, old_status), count in transitions.items():
+        Mailing.update_messages_counters(
+            mailing_id, old_status=old_status, new_status=status, count=count
+        )
+    for message in messages:
+        message.status = status
+        message._loaded_status = status
+
+
+def create_mailing_messages(mailing, chunk_size=None):
+    """
+    Create messages of a new mailing in chunks using bulk inserts.
+
+    The send window is checked once per time zone of the audience, then only
+    the IDs of the clients in open time zones are streamed from the database,
+    so memory usage does not depend on the audience size. Bulk inserts bypass
+    the post_save signals, so the mailing counters are incremented once per
+    chunk instead of once per message.
+
+    The clients count and each chunk are committed separately, so the
+    mailing progress grows while the messages are being created. Clients
+    that already have a message of the mailing are skipped, so an
+    interrupted fan-out can be run again.
+
+    Args:
+        mailing (Mailing): The new mailing object.
+        chunk_size (int, optional): The number of messages inserted at once.
+            Defaults to settings.MESSAGES_CHUNK_SIZE.
+
+    Returns:
+        int: The number of created messages.
+    """
+    chunk_size = chunk_size or settings.MESSAGES_CHUNK_SIZE
+    clients = mailing.get_mailing_clients()
+    time_zones_send_times = get_time_zones_send_times(
+        mailing,
+        clients.order_by().values_list("time_zone", flat=True).distinct(),
+    )
+    clients = clients.filter(
+        time_zone__in=[
+            time_zone
+            for time_zone, send_time in time_zones_send_times.items()
+            if send_time
         ]
-        mailing.set_clients_count(clients)
-        return list(
-            Message.objects.create(mailing=mailing, client=client)
-            for client in clients
+    )
+    mailing.set_clients_count(clients.count())
+    if Message.objects.filter(mailing=mailing).exists():
+        clients = clients.exclude(client_messages__mailing=mailing)
+    client_ids = clients.values_list("id", flat=True).iterator(
+        chunk_size=chunk_size
+    )
+    created_messages = 0
+    for chunk in chunked(client_ids, chunk_size):
+        with transaction.atomic():
+            Message.objects.bulk_create(
+                [
+                    Message(mailing=mailing, client_id=client_id)
+                    for client_id in chunk
+                ]
+            )
+            Mailing.update_messages_counters(
+                mailing.id,
+                new_status=Message.Status.SCHEDULED,
+                count=len(chunk),
+            )
+        created_messages += len(chunk)
+    return created_messages
+
+
+def get_day_range(day):
+    """
+    Returns the bounds of a day in the current time zone.
+
+    Filtering by a datetime range, unlike a __date lookup, can use indexes.
+
+    Args:
+        day (date): The day.
+
+    Returns:
+        tuple: The start of the day and the start of the next day.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def refresh_message_daily_stats_day(day, refreshed_at):
+    """
+    Recalculate the daily stats of the messages created on the given day.
+
+    The stats of archived mailings are kept as they are, because their
+    messages are no longer in the messages table.
+
+    Args:
+        day (date): The day the messages were created on.
+        refreshed_at (datetime): The time the refresh has started at.
+    """
+    day_start, day_end = get_day_range(day)
+    groups = (
+        Message.objects.filter(
+            created_at__gte=day_start,
+            created_at__lt=day_end,
+            mailing__isnull=False,
+            mailing__archived=False,
+        )
+        .values("mailing_id", "status", "client__operator_code")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    with transaction.atomic():
+        MessageDailyStats.objects.filter(
+            date=day, mailing__archived=False
+        ).delete()
+        MessageDailyStats.objects.bulk_create(
+            [
+                MessageDailyStats(
+                    date=day,
+                    mailing_id=group["mailing_id"],
+                    status=group["status"],
+                    operator_code=group["client__operator_code"],
+                    count=group["count"],
+                    refreshed_at=refreshed_at,
+                )
+                for group in groups
+            ]
+        )
+
+
+def refresh_message_daily_stats():
+    """
+    Bring the daily message stats up to date incrementally.
+
+    Messages keep the day they were created on, so only the days of the
+    messages changed since the previous refresh (the watermark) are
+    recalculated. updated_at is set before the changes are committed, so
+    the watermark is moved back by MESSAGE_DAILY_STATS_REFRESH_OVERLAP to
+    pick up the messages committed by transactions running during the
+    previous refresh.
+
+    Returns:
+        list: The recalculated days.
+    """
+    refreshed_at = timezone.now()
+    watermark = MessageDailyStats.objects.aggregate(Max("refreshed_at"))[
+        "refreshed_at__max"
+    ]
+    messages = Message.objects.filter(mailing__isnull=False)
+    if watermark:
+        messages = messages.filter(
+            updated_at__gte=watermark
+            - timedelta(seconds=settings.MESSAGE_DAILY_STATS_REFRESH_OVERLAP)
         )
-    return [message for message in Message.objects.filter(mailing=mailing)]
+    days = list(
+        messages.annotate(day=TruncDate("created_at"))
+        .order_by("day")
+        .values_list("day", flat=True)
+        .distinct()
+    )
+    for day in days:
+        refresh_message_daily_stats_day(day, refreshed_at)
+    return days
+
+
+ARCHIVED_MESSAGE_FIELDS = [
+    "id",
+    "datetime_send",
+    "status",
+    "mailing_id",
+    "client_id",
+    "celery_task_id",
+    "scheduled_at",
+    "attempts",
+    "created_at",
+    "updated_at",
+]
+
+
+def archive_mailing_messages(mailing, chunk_size=None):
+    """
+    Move the messages of the mailing to the archive table.
+
+    The mailing counters are recalculated and the mailing is marked as
+    archived first, so its counters and daily stats are not recalculated
+    from the partially moved messages. The messages are then moved in
+    chunks, each one in its own transaction. The chunks are read by ID
+    ranges, so each one starts where the previous one ended.
+
+    Args:
+        mailing (Mailing): The ended mailing.
+        chunk_size (int, optional): The number of messages moved at once.
+            Defaults to settings.MESSAGES_CHUNK_SIZE.
+
+    Returns:
+        int: The number of archived messages.
+    """
+    chunk_size = chunk_size or settings.MESSAGES_CHUNK_SIZE
+    if not mailing.archived:
+        mailing.update_messages_info()
+        mailing.archived = True
+        mailing.save(update_fields=["archived"])
+    messages = (
+        Message.objects.filter(mailing=mailing)
+        .order_by("id")
+        .values(*ARCHIVED_MESSAGE_FIELDS)
+    )
+    archived = last_id = 0
+    while rows := list(messages.filter(id__gt=last_id)[:chunk_size]):
+        with transaction.atomic():
+            ArchivedMessage.objects.bulk_create(
+                [ArchivedMessage(**row) for row in rows],
+                ignore_conflicts=True,
+            )
+            Message.objects.filter(id__in=[row["id"] for row in rows]).delete()
+        archived += len(rows)
+        last_id = rows[-1]["id"]
+    return archived
+
+
+def archive_ended_mailings(days=None, chunk_size=None):
+    """
+    Archive the messages of the mailings ended more than the given number
+    of days ago.
+
+    The daily message stats are brought up to date first, since they are no
+    longer recalculated for the archived mailings. Messages without a
+    mailing (their mailing was deleted) are never archived and stay in the
+    messages table.
+
+    Args:
+        days (int, optional): The number of days since the mailing end.
+            Defaults to settings.MESSAGES_ARCHIVE_AFTER_DAYS.
+        chunk_size (int, optional): The number of messages moved at once.
+
+    Returns:
+        dict: The number of archived messages by mailing ID.
+    """
+    if days is None:
+        days = settings.MESSAGES_ARCHIVE_AFTER_DAYS
+    ended_before = timezone.now() - timedelta(days=days)
+    refresh_message_daily_stats()
+    mailings = Mailing.objects.filter(
+        archived=False, datetime_end__lt=ended_before
+    ).order_by("id")
+    return {
+        mailing.id: archive_mailing_messages(mailing, chunk_size)
+        for mailing in mailings.iterator()
+    }
@@ -0,0 +1,6 @@
+from django.core.validators import RegexValidator
+
+phone_validator = RegexValidator(
+    r"^7\d{10}$",
+    message="Enter a valid phone number ('7XXXXXXXXXX')",
+)
@@ -1,18 +1,42 @@
+import codecs
+import functools
 import logging
 from datetime import datetime as dt
 
 import pytz
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from api.exporters import EXPORT_FORMATS, export_queryset
 from api.handlers.message_handler import MessageHandler
-from api.tasks import TaskManager
+from api.importers import import_clients, read_clients_csv, read_clients_ndjson
+from api.tasks import TaskManager, fanout_mailing
+from api.utils import get_day_range
 
-from .models import Client, Mailing, Message
-from .serializers import ClientSerializer, MailingSerializer
+from .models import (
+    ArchivedMessage,
+    Client,
+    Mailing,
+    Message,
+    MessageDailyStats,
+)
+from .pagination import MessageCursorPagination
+from .serializers import (
+    ClientSerializer,
+    MailingProgressSerializer,
+    MailingSerializer,
+    MessageDailyStatsFilterSerializer,
+    MessageDailyStatsSerializer,
+    MessageSerializer,
+)
 
 logger = logging.getLogger("api")
 
@@ -20,6 +44,75 @@ task_manager = TaskManager()
 
 message_handler = MessageHandler()
 
+clients_readers = {
+    "text/csv": read_clients_csv,
+    "application/x-ndjson": read_clients_ndjson,
+}
+
+
+def filter_messages_by_status(messages, statuses):
+    if not statuses:
+        return messages
+    statuses = statuses.split(",")
+    if not set(statuses) <= set(Message.Status.values):
+        raise serializers.ValidationError(
+            {"status": f"Choose from {Message.Status.values}"}
+        )
+    return messages.filter(status__in=statuses)
+
+
+def filter_by_created_at(queryset, date_from, date_to):
+    for param, value, lookup in (
+        ("date_from", date_from, "gte"),
+        ("date_to", date_to, "lte"),
+    ):
+        if not value:
+            continue
+        try:
+            value_date = parse_date(value)
+            value_datetime = parse_datetime(value)
+        except ValueError:
+            value_date = value_datetime = None
+        if value_date:
+            # The bounds of the day are used, since a __date lookup cannot
+            # use the created_at index
+            day_start, day_end = get_day_range(value_date)
+            if lookup == "gte":
+                queryset = queryset.filter(created_at__gte=day_start)
+            else:
+                queryset = queryset.filter(created_at__lt=day_end)
+        elif value_datetime:
+            if timezone.is_naive(value_datetime):
+                value_datetime = timezone.make_aware(value_datetime)
+            queryset = queryset.filter(
+                **{f"created_at__{lookup}": value_datetime}
+            )
+        else:
+            raise serializers.ValidationError(
+                {param: "Enter a valid date or datetime"}
+            )
+    return queryset
+
+
+def get_export_response(queryset, fields, name, query_params):
+    file_format = query_params.get("file_format", "csv")
+    if file_format not in EXPORT_FORMATS:
+        raise serializers.ValidationError(
+            {"file_format": f"Choose from {list(EXPORT_FORMATS)}"}
+        )
+    compress = query_params.get("compress") == "gzip"
+    _, content_type = EXPORT_FORMATS[file_format]
+    filename = f"{name}.{file_format}"
+    if compress:
+        content_type = "application/gzip"
+        filename = f"{filename}.gz"
+    response = StreamingHttpResponse(
+        export_queryset(queryset, fields, file_format, compress=compress),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
 
 class ClientViewSet(viewsets.ModelViewSet):
     queryset = Client.objects.all()
@@ -43,6 +136,114 @@ class ClientViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request, *args, **kwargs):
+        media_type = request.content_type.split(";")[0].strip()
+        reader = clients_readers.get(media_type)
+        if reader is None:
+            return Response(
+                {"detail": f"Choose from {list(clients_readers)}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        # The body is read line by line instead of being loaded at once
+        lines = codecs.iterdecode(request.stream or [], "utf-8")
+        try:
+            result = import_clients(reader(lines))
+        except UnicodeDecodeError as e:
+            logger.error(f"Failed to import clients. Error: {e}")
+            return Response(
+                {"detail": "File must be encoded in UTF-8"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        logger.info(
+            f"Clients imported: {result['imported']}, failed: {result['failed']}"
+        )
+        return Response(result)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        clients = filter_by_created_at(
+            Client.objects.all(),
+            request.query_params.get("date_from"),
+            request.query_params.get("date_to"),
+        )
+        return get_export_response(
+            clients,
+            ClientSerializer.Meta.fields,
+            "clients",
+            request.query_params,
+        )
+
+
+class MessageViewSet(viewsets.GenericViewSet):
+    queryset = Message.objects.all()
+    serializer_class = MessageSerializer
+
+    @action(detail=False, methods=["get"])
+    def export(self, request, *args, **kwargs):
+        mailing_id = request.query_params.get("mailing")
+        if mailing_id and not mailing_id.isdigit():
+            raise serializers.ValidationError(
+                {"mailing": "Enter a valid mailing ID"}
+            )
+
+        def filter_messages(messages):
+            if mailing_id:
+                messages = messages.filter(mailing=mailing_id)
+            messages = filter_messages_by_status(
+                messages, request.query_params.get("status")
+            )
+            return filter_by_created_at(
+                messages,
+                request.query_params.get("date_from"),
+                request.query_params.get("date_to"),
+            ).order_by()
+
+        # The messages of archived mailings are in the archive table, and
+        # the messages being archived right now are in either of the tables
+        fields = MessageSerializer.Meta.fields
+        messages = (
+            filter_messages(Message.objects.values_list(*fields))
+            .union(
+                filter_messages(ArchivedMessage.objects.values_list(*fields)),
+                all=True,
+            )
+            .order_by("id")
+        )
+        return get_export_response(
+            messages,
+            MessageSerializer.Meta.fields,
+            "messages",
+            request.query_params,
+        )
+
+
+class MessageDailyStatsViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = MessageDailyStats.objects.all()
+    serializer_class = MessageDailyStatsSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+        filters = MessageDailyStatsFilterSerializer(
+            data=self.request.query_params
+        )
+        filters.is_valid(raise_exception=True)
+        lookups = {
+            "date_from": "date__gte",
+            "date_to": "date__lte",
+            "mailing": "mailing_id",
+            "status": "status",
+            "operator_code": "operator_code",
+        }
+        return queryset.filter(
+            **{
+                lookups[field]: value
+                for field, value in filters.validated_data.items()
+            }
+        )
+
 
 class MailingViewSet(viewsets.ModelViewSet):
     queryset = Mailing.objects.all()
@@ -60,10 +261,18 @@ class MailingViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         try:
             serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
+            if settings.MAILING_FANOUT_ASYNC:
+                serializer.save(fanout_status=Mailing.FanoutStatus.PENDING)
+                transaction.on_commit(
+                    functools.partial(
+                        fanout_mailing.delay, serializer.instance.id
+                    )
+                )
+            else:
+                self.perform_create(serializer)
+                message_handler.create_messages(serializer.instance.id)
+                serializer.instance.refresh_from_db()
             headers = self.get_success_headers(serializer.data)
-            mailing_id = serializer.data["id"]
-            message_handler.create_messages(mailing_id)
             return Response(
                 serializer.data,
                 status=status.HTTP_201_CREATED,
@@ -98,14 +307,33 @@ class MailingViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def retrieve(self, request, *args, **kwargs):
+    @action(detail=True, methods=["get"])
+    def messages(self, request, *args, **kwargs):
+        instance = self.get_object()
+        model = ArchivedMessage if instance.archived else Message
+        messages = filter_messages_by_status(
+            model.objects.filter(mailing=instance),
+            request.query_params.get("status"),
+        )
+        if request.query_params.get("stream") == "true":
+            return StreamingHttpResponse(
+                export_queryset(
+                    messages.order_by("id"),
+                    MessageSerializer.Meta.fields,
+                    "ndjson",
+                ),
+                content_type="application/x-ndjson",
+            )
+        paginator = MessageCursorPagination()
+        page = paginator.paginate_queryset(messages, request, view=self)
+        serializer = MessageSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    def progress(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        data = serializer.data
-        mailing_id = data["id"]
-        messages = Message.objects.filter(mailing=mailing_id).values()
-        data["mailing_messages"] = list(messages)
-        return Response(data)
+        serializer = MailingProgressSerializer(instance)
+        return Response(serializer.data)
 
     @staff_member_required
     def admin_mailing_detail(self, request, mailing_id):
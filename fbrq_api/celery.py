@@ -3,6 +3,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 from django.conf import settings
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fbrq_api.settings")
@@ -14,6 +15,16 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
 
+@worker_process_shutdown.connect
+def stop_log_listeners(**kwargs):
+    # Pool processes exit without running the atexit hooks
+    from api.log import QueueListenerHandler
+
+    for handler in logger.handlers:
+        if isinstance(handler, QueueListenerHandler):
+            handler.stop()
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f"Request: {self.request!r}")
@@ -24,4 +35,20 @@ app.conf.beat_schedule = {
         "task": "Statictics Email",
         "schedule": crontab(hour=0, minute=1),
     },
+    "release_mailing_schedules": {
+        "task": "Release mailing schedules",
+        "schedule": crontab(),
+    },
+    "reconcile_mailings_stats": {
+        "task": "Reconcile mailings stats",
+        "schedule": crontab(minute="*/15"),
+    },
+    "refresh_message_daily_stats": {
+        "task": "Refresh message daily stats",
+        "schedule": crontab(minute="*/15"),
+    },
+    "archive_messages": {
+        "task": "Archive messages",
+        "schedule": crontab(hour=3, minute=0),
+    },
 }
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 
@@ -110,6 +111,17 @@ else:
         }
     }
 
+# Cache shared by the workers, e.g. "redis://redis:6379" or "memcached:11211"
+if os.getenv("CACHE_LOCATION"):
+    CACHES = {
+        "default": {
+            "BACKEND": os.getenv(
+                "CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache"
+            ),
+            "LOCATION": os.getenv("CACHE_LOCATION"),
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -162,8 +174,8 @@ LOGGING = {
     "disable_existing_loggers": False,
     "loggers": {
         "api": {
-            "level": "INFO",
-            "handlers": ["file"],
+            "level": os.getenv("LOG_LEVEL", "INFO"),
+            "handlers": ["queue"],
         },
     },
     "handlers": {
@@ -172,6 +184,10 @@ LOGGING = {
             "filename": "app.log",
             "formatter": "verbose",
         },
+        "queue": {
+            "class": "api.log.QueueListenerHandler",
+            "handlers": ["cfg://handlers.file"],
+        },
     },
     "formatters": {
         "verbose": {
@@ -185,6 +201,26 @@ LOGGING = {
     },
 }
 
+# Share (from 0 to 1) of the API requests logged, paths starting with the
+# excluded prefixes are not logged and bodies are truncated to the length
+API_LOG_SAMPLE_RATE = float(os.getenv("API_LOG_SAMPLE_RATE", 1))
+API_LOG_EXCLUDED_PATHS = os.getenv(
+    "API_LOG_EXCLUDED_PATHS", "/metrics,/static/"
+).split(",")
+API_LOG_MAX_BODY_LENGTH = int(os.getenv("API_LOG_MAX_BODY_LENGTH", 1000))
+
+# Levels and sampling rates (from 0 to 1) of the models' changes logging by
+# model name, e.g. '{"Message": "INFO"}' and '{"Message": 0.01}'
+SIGNALS_LOG_LEVELS = {
+    "Client": "INFO",
+    "Mailing": "INFO",
+    "Message": "DEBUG",
+    **json.loads(os.getenv("SIGNALS_LOG_LEVELS", "{}")),
+}
+SIGNALS_LOG_SAMPLE_RATES = json.loads(
+    os.getenv("SIGNALS_LOG_SAMPLE_RATES", "{}")
+)
+
 EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
@@ -200,6 +236,26 @@ EMAIL_RECIPIENTS = {
 
 API_URL = os.getenv("API_URL")
 API_TOKEN = os.getenv("API_TOKEN")
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", 3.05))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", 10))
+API_POOL_CONNECTIONS = int(os.getenv("API_POOL_CONNECTIONS", 10))
+API_POOL_MAXSIZE = int(os.getenv("API_POOL_MAXSIZE", 10))
+# Requests kept in flight by a batch task, should not exceed API_POOL_MAXSIZE
+API_CONCURRENCY = int(os.getenv("API_CONCURRENCY", 10))
+# Messages per second sent to an external service API, 0 disables the limit
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", 0))
+# Messages per second by operator code, e.g. '{"999": 10}'
+API_OPERATOR_RATE_LIMITS = json.loads(
+    os.getenv("API_OPERATOR_RATE_LIMITS", "{}")
+)
+API_RATE_LIMIT_STORE = os.getenv(
+    "API_RATE_LIMIT_STORE", "api.ratelimit.DatabaseStore"
+)
+API_RETRY_MAX_ATTEMPTS = int(os.getenv("API_RETRY_MAX_ATTEMPTS", 5))
+# Retry delays (in sec) grow exponentially from the base up to the max
+API_RETRY_BACKOFF_BASE = float(os.getenv("API_RETRY_BACKOFF_BASE", 10))
+API_RETRY_BACKOFF_MAX = float(os.getenv("API_RETRY_BACKOFF_MAX", 600))
+API_RETRY_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
 
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
 AUTH0_CLIENT_ID = os.getenv("AUTH0_CLIENT_ID")
@@ -245,10 +301,40 @@ PROMETHEUS_LATENCY_BUCKETS = (
     float("inf"),
 )
 
-PAGE_SIZE = 25
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 25))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 1000))
+
+# Clients upserted at once and failed rows reported by the clients import
+CLIENTS_IMPORT_CHUNK_SIZE = int(os.getenv("CLIENTS_IMPORT_CHUNK_SIZE", 1000))
+CLIENTS_IMPORT_MAX_ERRORS = int(os.getenv("CLIENTS_IMPORT_MAX_ERRORS", 1000))
+# Rows fetched from the database and written at once by exports
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+
+# Create messages of new mailings in a Celery task instead of the request
+MAILING_FANOUT_ASYNC = os.getenv("MAILING_FANOUT_ASYNC", "") == "True"
+MESSAGES_CHUNK_SIZE = int(os.getenv("MESSAGES_CHUNK_SIZE", 1000))
+# "single" - one Celery task per message, "batch" - one Celery task per
+# group of messages sharing the same send time, "bucket" - one schedule entry
+# per mailing time zone released by the "Release mailing schedules" task
+MESSAGES_DISPATCH_MODE = os.getenv("MESSAGES_DISPATCH_MODE", "single")
+MESSAGES_BATCH_SIZE = int(os.getenv("MESSAGES_BATCH_SIZE", 500))
+# Time (in sec) a worker process trusts a cached mailing version
+MAILING_VERSION_CACHE_TTL = float(os.getenv("MAILING_VERSION_CACHE_TTL", 5))
+# Maximum number of mailing versions cached by a worker process
+MAILING_VERSION_CACHE_SIZE = int(os.getenv("MAILING_VERSION_CACHE_SIZE", 1000))
+# Mailings ended within this number of days get their counters recomputed
+MAILINGS_STATS_RECONCILE_DAYS = int(
+    os.getenv("MAILINGS_STATS_RECONCILE_DAYS", 1)
+)
+# Time (in sec) the daily stats refresh looks back before its previous run
+MESSAGE_DAILY_STATS_REFRESH_OVERLAP = int(
+    os.getenv("MESSAGE_DAILY_STATS_REFRESH_OVERLAP", 600)
+)
+# Messages of mailings ended this number of days ago are moved to the archive
+MESSAGES_ARCHIVE_AFTER_DAYS = int(os.getenv("MESSAGES_ARCHIVE_AFTER_DAYS", 30))
 
 REST_FRAMEWORK = {
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.PageNumberOrCursorPagination",
     "PAGE_SIZE": PAGE_SIZE,
 }